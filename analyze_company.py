@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 """
 Company Analysis Script for HR Candidate Scorer
-Runs during deployment to analyze company profile once and save for reuse
+Runs during deployment to analyze company profile once and save for reuse.
+Per-page content hashes are kept beside the profile, so a deploy where no
+company page (nor the analysis prompt or model) has changed skips Gemini.
+With COMPANY_TENANT set, the profile is written to the tenant registry
+(COMPANY_PROFILES_DIR/<tenant>.json) instead of company_profile.json.
 """
 
 import os
 import sys
 import json
-import google.generativeai as genai
-from utils import analyze_company_profile
+from utils import extract_company_pages, analyze_company_pages, company_page_hashes
+from prompts import COMPANY_PROFILE_PATH, COMPANY_PROFILES_DIR, get_prompt_version, write_json_atomic
+from tenants import TENANT_PATTERN
+
+def profile_paths(tenant=None):
+    """Where the profile and its page hashes are written: (profile path, page hash manifest path)"""
+    profile_path = os.path.join(COMPANY_PROFILES_DIR, f"{tenant}.json") if tenant else COMPANY_PROFILE_PATH
+    return profile_path, os.path.splitext(profile_path)[0] + '.pages.json'
+
+def load_pages_manifest(path):
+    """Page hashes recorded by the last successful analysis, or None"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 def main():
     """Main function to run company analysis"""
@@ -18,6 +36,8 @@ def main():
     GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.5-pro')
     COMPANY_WEBSITE = os.environ.get('COMPANY_WEBSITE')
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    FORCE = os.environ.get('COMPANY_ANALYSIS_FORCE', 'false').lower() == 'true'
+    TENANT = os.environ.get('COMPANY_TENANT', '').strip().lower()
     
     if not PROJECT_ID:
         print("❌ GCP_PROJECT_ID environment variable is required")
@@ -31,24 +51,57 @@ def main():
         print("ℹ️  No COMPANY_WEBSITE provided - skipping company analysis")
         sys.exit(0)
     
+    if TENANT and not TENANT_PATTERN.match(TENANT):
+        print("❌ COMPANY_TENANT may only contain lowercase letters, digits, '-' and '_'")
+        sys.exit(1)
+    
+    profile_path, manifest_path = profile_paths(TENANT)
+    
     try:
         print(f"🚀 Starting company analysis for: {COMPANY_WEBSITE}")
         print(f"📍 Project: {PROJECT_ID}")
         print(f"🤖 Model: {GEMINI_MODEL}")
+        if TENANT:
+            print(f"🏷️  Tenant: {TENANT}")
+        
+        company_pages = extract_company_pages(COMPANY_WEBSITE)
+        if not company_pages:
+            print("❌ No company pages could be extracted")
+            sys.exit(1)
+        
+        manifest = {
+            "website": COMPANY_WEBSITE,
+            "model": GEMINI_MODEL,
+            "prompt_version": get_prompt_version("analyze_company_profile"),
+            "pages": company_page_hashes(company_pages)
+        }
+        previous = load_pages_manifest(manifest_path)
+        if not FORCE and previous == manifest and os.path.exists(profile_path):
+            print(f"✅ Company pages unchanged since the last analysis - keeping {profile_path}")
+            sys.exit(0)
+        if previous and previous.get("pages") != manifest["pages"]:
+            old_pages = previous.get("pages", {})
+            changed = sorted(
+                page for page in set(old_pages) | set(manifest["pages"])
+                if old_pages.get(page) != manifest["pages"].get(page)
+            )
+            print(f"🔄 Changed pages: {', '.join(changed)}")
         
-        # Initialize Gemini API
+        # Initialize Gemini API only once there is something to analyze
+        import google.generativeai as genai
         genai.configure(api_key=GEMINI_API_KEY)
         model = genai.GenerativeModel(GEMINI_MODEL)
         
-        # Analyze company profile using the utility function
-        company_profile = analyze_company_profile(COMPANY_WEBSITE, model)
+        company_profile = analyze_company_pages(company_pages, model)
         
         if company_profile:
-            # Save to file
-            with open('company_profile.json', 'w') as f:
-                json.dump(company_profile, f, indent=2)
+            # Written atomically so a running server that hot-reloads the profile never reads a partial file
+            if os.path.dirname(profile_path):
+                os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            write_json_atomic(profile_path, company_profile)
+            write_json_atomic(manifest_path, manifest)
             
-            print("✅ Company profile saved to company_profile.json")
+            print(f"✅ Company profile saved to {profile_path}")
             
             # Print summary
             print("\n📊 Company Analysis Summary:")
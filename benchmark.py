@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the HR Candidate Scorer application.
+
+Gemini, Document AI and job posting sites are replaced with local fakes
+with configurable latency, jitter, error rate and response size. The Flask
+app is driven at a target concurrency with synthetic resumes and job
+descriptions, and latency percentiles, throughput and peak RSS are written
+to a JSON file so runs can be compared. `--startup` instead measures cold
+start: importing main.py and serving the first request in fresh processes.
+
+Usage:
+    python benchmark.py --requests 200 --concurrency 8 --output bench.json
+    python benchmark.py --compare bench.json --output bench-new.json
+    python benchmark.py --startup --runs 5 --output startup.json
+"""
+
+import io
+import os
+import sys
+import zlib
+import json
+import time
+import random
+import argparse
+import datetime
+import platform
+import threading
+import subprocess
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# main.py requires these at import; the fakes never use them. Keep the resume
+# cache in memory so earlier runs don't turn this one into cache hits.
+os.environ.setdefault('GCP_PROJECT_ID', 'benchmark')
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+os.environ.setdefault('DOCUMENT_AI_PROCESSOR_ID', 'benchmark-processor')
+os.environ.setdefault('RESUME_CACHE_PATH', '')
+os.environ.setdefault('GEMINI_CONTEXT_CACHE', 'false')
+
+import requests_mock
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SKILLS = ["Python", "Go", "Kubernetes", "PostgreSQL", "React", "AWS", "GCP", "Terraform",
+          "Kafka", "Spark", "TypeScript", "Java", "Machine Learning", "Docker", "Redis", "GraphQL"]
+TITLES = ["Software Engineer", "Data Engineer", "Platform Engineer", "Backend Developer",
+          "Frontend Developer", "ML Engineer", "Site Reliability Engineer", "Engineering Manager"]
+JD_HOST = "https://jobs.benchmark.example"
+
+# SDKs main.py defers until first use; none of them should be imported with main
+DEFERRED_MODULES = ("google.generativeai", "google.cloud.documentai", "PyPDF2", "bs4", "requests")
+
+STARTUP_SCRIPT = """
+import sys, json, time, importlib
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+main.app.test_client().get('/')
+first_response = time.perf_counter()
+for name in DEFERRED_MODULES:
+    importlib.import_module(name)
+deferred = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_response_seconds": first_response - started,
+    "deferred_import_seconds": deferred - first_response,
+    "deferred_modules_loaded_at_import": loaded
+}))
+"""
+
+class FakeLatency:
+    """Samples a delay of `mean` seconds +/- `jitter` and fails with probability `error_rate`"""
+
+    def __init__(self, mean, jitter=0.0, error_rate=0.0, rng=None):
+        self.mean = mean
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def wait(self, what):
+        with self._lock:
+            delay = max(0.0, self.mean + self.rng.uniform(-self.jitter, self.jitter))
+            fail = self.rng.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"Injected {what} failure")
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+class FakeStream:
+    """Streamed response: iterating yields chunks, usage is available afterwards"""
+
+    def __init__(self, text, usage_metadata, chunks=8):
+        size = max(1, -(-len(text) // chunks))
+        self._chunks = [FakeResponse(text[i:i + size], None) for i in range(0, len(text), size)]
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+class FakeGenerativeModel:
+    """Stand-in for genai.GenerativeModel returning schema-shaped JSON"""
+
+    latency = FakeLatency(0.0)
+    output_tokens = 400
+
+    def __init__(self, model_name=None, system_instruction=None, **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+
+    @classmethod
+    def from_cached_content(cls, cached_content, **kwargs):
+        return cls()
+
+    def _payload(self, prompt):
+        rng = random.Random(zlib.crc32(prompt.encode('utf-8')))
+        # Pad the free-text fields so the response is roughly `output_tokens` long (~4 chars per token)
+        filler = " ".join(rng.choice(SKILLS).lower() for _ in range(max(1, self.output_tokens * 4 // 8)))
+        if not prompt.startswith("Analyze the following resume"):
+            return {
+                "overall_score": rng.randint(1, 10),
+                "technical_skills_score": rng.randint(1, 10),
+                "experience_score": rng.randint(1, 10),
+                "cultural_fit_score": rng.randint(1, 10),
+                "recommendation": rng.choice(["Strong Hire", "Hire", "Maybe", "No Hire"]),
+                "strengths": rng.sample(SKILLS, 3),
+                "weaknesses": rng.sample(SKILLS, 2),
+                "rationale": filler
+            }
+        return {
+            "name": f"Candidate {rng.randint(1, 10 ** 6)}",
+            "skills": rng.sample(SKILLS, 5),
+            "experience_years": rng.randint(0, 20),
+            "summary": filler
+        }
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        self.latency.wait("Gemini")
+        text = json.dumps(self._payload(str(prompt)))
+        prompt_chars = len(str(prompt)) + len(self.system_instruction or "")
+        usage = FakeUsage(prompt_chars // 4, len(text) // 4)
+        if stream:
+            return FakeStream(text, usage)
+        return FakeResponse(text, usage)
+
+class FakeDocumentAIClient:
+    """Stand-in for documentai.DocumentProcessorServiceClient; the 'PDF' bytes are the text"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def processor_path(self, project_id, location, processor_id):
+        return f"projects/{project_id}/locations/{location}/processors/{processor_id}"
+
+    def process_document(self, request):
+        self.latency.wait("Document AI")
+        content = request.raw_document.content.decode('utf-8', errors='ignore')
+
+        class Result:
+            class document:
+                text = content
+        return Result
+
+def make_resume(rng, index):
+    """Synthetic plain-text resume"""
+    skills = rng.sample(SKILLS, 6)
+    jobs = "\n".join(
+        f"- {rng.choice(TITLES)} at Company {rng.randint(1, 500)} ({2024 - year - 2}-{2024 - year}): "
+        f"built {rng.choice(SKILLS)} services handling {rng.randint(1, 900)}k requests/day"
+        for year in range(0, rng.randint(2, 6) * 2, 2)
+    )
+    return (
+        f"Candidate {index}\nEmail: candidate{index}@example.com\n\n"
+        f"SUMMARY\n{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience.\n\n"
+        f"SKILLS\n{', '.join(skills)}\n\nEXPERIENCE\n{jobs}\n"
+    )
+
+def make_jd(rng, index):
+    """Synthetic job posting page"""
+    title = rng.choice(TITLES)
+    requirements = "".join(f"<li>{skill}</li>" for skill in rng.sample(SKILLS, 5))
+    return (
+        f"<html><head><title>{title}</title><script>var tracking = {index};</script></head>"
+        f"<body><h1>{title}</h1><p>Posting {index}. We are hiring a {title} to join our team.</p>"
+        f"<ul>{requirements}</ul></body></html>"
+    )
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its children (e.g. PDF workers) in MB"""
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {"self": round(own / scale, 1), "children": round(children / scale, 1)}
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def summarize_latencies(latencies):
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "max": max(latencies) if latencies else None
+    }
+
+def run_benchmark(args):
+    """Drive /analyze with the fakes installed and return the results dict"""
+    import main
+
+    rng = random.Random(args.seed)
+    gemini_latency = FakeLatency(args.gemini_latency, args.gemini_jitter, args.gemini_error_rate, random.Random(rng.random()))
+    docai_latency = FakeLatency(args.docai_latency, args.docai_jitter, args.docai_error_rate, random.Random(rng.random()))
+    jd_latency = FakeLatency(args.jd_latency, args.jd_jitter, args.jd_error_rate, random.Random(rng.random()))
+    FakeGenerativeModel.latency = gemini_latency
+    FakeGenerativeModel.output_tokens = args.output_tokens
+    fake_genai = SimpleNamespace(
+        GenerativeModel=FakeGenerativeModel,
+        types=SimpleNamespace(GenerationConfig=lambda **kwargs: kwargs),
+        caching=None
+    )
+
+    resumes = [make_resume(rng, index).encode('utf-8') for index in range(args.resumes or args.requests)]
+    jds = [make_jd(rng, index) for index in range(args.jds)]
+
+    def jd_page(request, context):
+        jd_latency.wait("job site")
+        return jds[int(request.path.rsplit('/', 1)[-1])]
+
+    def one_request(client, index):
+        resume = resumes[index % len(resumes)]
+        started = time.perf_counter()
+        response = client.post('/analyze', data={
+            'jd_url': f"{JD_HOST}/jobs/{index % len(jds)}",
+            'timings': 'true',
+            'resume_file': (io.BytesIO(resume), f"resume-{index}.pdf")
+        }, content_type='multipart/form-data')
+        elapsed = time.perf_counter() - started
+        body = response.get_json(silent=True) or {}
+        return elapsed, response.status_code == 200 and bool(body.get("success")), body.get("timings"), body.get("error")
+
+    local = threading.local()
+
+    def worker(index):
+        if not hasattr(local, 'client'):
+            local.client = main.app.test_client()
+        return one_request(local.client, index)
+
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'get_genai', return_value=fake_genai), \
+         patch.object(main, 'get_model', return_value=FakeGenerativeModel(main.GEMINI_MODEL)), \
+         patch.object(main, 'PROCESSOR_ID', main.PROCESSOR_ID or 'benchmark-processor'), \
+         patch('pdf_extraction._client', FakeDocumentAIClient(docai_latency)):
+        m.get(requests_mock.ANY, text=jd_page)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            if args.warmup:
+                list(pool.map(worker, range(-args.warmup, 0)))
+            started = time.perf_counter()
+            outcomes = list(pool.map(worker, range(args.requests)))
+            wall = time.perf_counter() - started
+
+    latencies = [elapsed for elapsed, ok, _, _ in outcomes if ok]
+    errors = {}
+    for _, ok, _, error in outcomes:
+        if not ok:
+            key = (error or "unknown").split(":")[0]
+            errors[key] = errors.get(key, 0) + 1
+
+    stage_latencies = {}
+    for _, ok, timings, _ in outcomes:
+        for stage, seconds in ((timings or {}).get("stages") or {}).items():
+            stage_latencies.setdefault(stage, []).append(seconds)
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        "requests": args.requests,
+        "succeeded": len(latencies),
+        "failed": args.requests - len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(outcomes) / wall, 3) if wall else None,
+        "latency_seconds": summarize_latencies(latencies),
+        "stage_latency_seconds": {stage: summarize_latencies(values) for stage, values in sorted(stage_latencies.items())},
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def _top_imports(stderr, limit=10):
+    """Slowest modules imported directly by main.py, from `-X importtime` output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown as two extra spaces per level and a module is listed after its children
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 1:
+            imports.append((int(cumulative), name.strip()))
+        elif level == 0:
+            if name.strip() == "main":
+                break
+            imports = []
+    return [{"module": name, "seconds": round(micros / 1e6, 4)} for micros, name in sorted(imports, reverse=True)[:limit]]
+
+def run_startup_benchmark(args):
+    """Measure import and first-response time of main.py in fresh interpreters"""
+    script = f"DEFERRED_MODULES = {DEFERRED_MODULES!r}\n" + STARTUP_SCRIPT
+    runs = []
+    top_imports = []
+    for index in range(args.runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script] if index == 0 else [sys.executable, "-c", script],
+            capture_output=True, text=True, env=dict(os.environ), cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Startup run failed: {completed.stderr.strip().splitlines()[-1:]}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        if index == 0:
+            top_imports = _top_imports(completed.stderr)
+
+    def summary(key):
+        return summarize_latencies([run[key] for run in runs])
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "import_seconds": summary("import_seconds"),
+        "first_response_seconds": summary("first_response_seconds"),
+        "deferred_import_seconds": summary("deferred_import_seconds"),
+        "deferred_modules_loaded_at_import": sorted({name for run in runs for name in run["deferred_modules_loaded_at_import"]}),
+        "top_imports": top_imports
+    }
+
+def print_startup_report(results, baseline=None):
+    for key in ("import_seconds", "first_response_seconds", "deferred_import_seconds"):
+        value = results[key]["p50"]
+        line = f"   {key}: p50={value:.3f}s"
+        if baseline and baseline.get(key, {}).get("p50"):
+            change = (value - baseline[key]["p50"]) / baseline[key]["p50"] * 100
+            line += f" ({change:+.1f}% vs baseline)"
+        print(line)
+    if results["deferred_modules_loaded_at_import"]:
+        print(f"   ⚠️  imported eagerly: {', '.join(results['deferred_modules_loaded_at_import'])}")
+    for entry in results["top_imports"][:5]:
+        print(f"   import {entry['module']}: {entry['seconds']:.3f}s")
+
+def print_report(results, baseline=None):
+    latency = results["latency_seconds"]
+    print(f"📊 {results['succeeded']}/{results['requests']} succeeded in {results['wall_seconds']}s "
+          f"({results['requests_per_second']} req/s)")
+    for key in ("p50", "p95", "p99"):
+        value = latency[key]
+        line = f"   {key}: {value:.3f}s" if value is not None else f"   {key}: n/a"
+        if baseline and value is not None and baseline["latency_seconds"].get(key):
+            change = (value - baseline["latency_seconds"][key]) / baseline["latency_seconds"][key] * 100
+            line += f" ({change:+.1f}% vs baseline)"
+        print(line)
+    if baseline and baseline.get("requests_per_second") and results["requests_per_second"]:
+        change = (results["requests_per_second"] - baseline["requests_per_second"]) / baseline["requests_per_second"] * 100
+        print(f"   throughput: {change:+.1f}% vs baseline")
+    for stage, stats in results["stage_latency_seconds"].items():
+        print(f"   stage {stage}: p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s")
+    if results["errors"]:
+        print(f"   errors: {results['errors']}")
+    if results["peak_rss_mb"]:
+        print(f"   peak RSS: {results['peak_rss_mb']['self']} MB (children {results['peak_rss_mb']['children']} MB)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline /analyze benchmark with local fakes")
+    parser.add_argument('--requests', type=int, default=100, help="Measured requests")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--warmup', type=int, default=0, help="Unmeasured requests sent first")
+    parser.add_argument('--resumes', type=int, default=0, help="Distinct resumes (default: one per request, so no cache hits)")
+    parser.add_argument('--jds', type=int, default=5, help="Distinct job postings")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--gemini-latency', type=float, default=0.2, help="Mean seconds per Gemini call")
+    parser.add_argument('--gemini-jitter', type=float, default=0.05)
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0)
+    parser.add_argument('--output-tokens', type=int, default=400, help="Approximate Gemini response size in tokens")
+    parser.add_argument('--docai-latency', type=float, default=0.1, help="Mean seconds per Document AI call")
+    parser.add_argument('--docai-jitter', type=float, default=0.02)
+    parser.add_argument('--docai-error-rate', type=float, default=0.0)
+    parser.add_argument('--jd-latency', type=float, default=0.05, help="Mean seconds per job site fetch")
+    parser.add_argument('--jd-jitter', type=float, default=0.01)
+    parser.add_argument('--jd-error-rate', type=float, default=0.0)
+    parser.add_argument('--startup', action='store_true', help="Measure cold start instead of request throughput")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to start with --startup")
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    if args.startup:
+        print(f"🚀 Benchmarking startup: {args.runs} fresh interpreters")
+        results = run_startup_benchmark(args)
+        print_startup_report(results, baseline)
+    else:
+        print(f"🚀 Benchmarking /analyze: {args.requests} requests at concurrency {args.concurrency}")
+        results = run_benchmark(args)
+        print_report(results, baseline)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted prompt inputs for the HR Candidate Scorer application.
+
+Long resumes, job postings and company pages are split into lines grouped
+under their section headings. Each line is ranked by how much it matters
+for scoring (experience, skills, requirements) versus boilerplate
+(navigation, cookie and legal notices), and the best lines are packed into
+the field's token budget in their original order. Inputs that already fit are passed through untouched.
+"""
+
+import re
+
+from metrics import PROMPT_BUDGET_TOKENS, PROMPT_BUDGET_TRIMS
+
+# Gemini averages about four characters of English per token; close enough for budgeting without a round trip
+CHARS_PER_TOKEN = 4
+OMITTED_MARKER = "[...]"
+# Once an input has to be trimmed, lines weighted below this (boilerplate, menus) are dropped even if they would fit
+MIN_WEIGHT = 0.5
+# A boilerplate phrase marks a whole line as boilerplate only in short lines or when such phrases are dense,
+# so a paragraph ending in an equal-opportunity sentence isn't thrown away with the footer
+BOILERPLATE_MAX_WORDS = 25
+BOILERPLATE_WORDS_PER_MATCH = 12
+
+# Kind of content carried by each prompt field, which picks the relevant headings
+FIELD_KINDS = {"resume_text": "resume", "jd_text": "jd", "combined_content": "company"}
+
+# Headings whose sections are worth keeping, by kind of input
+RELEVANT_HEADINGS = {
+    "resume": ("experience", "employment", "work history", "skills", "projects", "summary", "profile",
+               "education", "certification", "achievement", "technical", "expertise"),
+    "jd": ("requirement", "qualification", "responsibilit", "what you", "you will", "you'll", "skills",
+           "experience", "about the role", "the role", "must have", "nice to have", "preferred", "duties"),
+    "company": ("about", "mission", "values", "culture", "product", "service", "team", "who we are", "careers"),
+}
+
+BOILERPLATE_PATTERN = re.compile(
+    r"cookie|privacy (policy|notice)|terms (of|and) (use|service|conditions)|all rights reserved|©|copyright|"
+    r"sign in|log in|subscribe|newsletter|follow us|share this|similar jobs|skip to (main )?content|"
+    r"enable javascript|equal opportunity employer|accommodation",
+    re.IGNORECASE
+)
+
+def estimate_tokens(text):
+    """Approximate Gemini token count of `text`"""
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _is_heading(line):
+    if len(line.split()) > 6:
+        return False
+    return line.endswith(':') or line.isupper() or line.startswith('---')
+
+def split_blocks(text):
+    """Split text into non-empty lines, each paired with the heading it falls under ("" before any heading)"""
+    blocks, heading = [], ""
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if _is_heading(line):
+            heading = line
+        blocks.append((heading, line))
+    return blocks
+
+def _is_boilerplate(line):
+    matches = len(BOILERPLATE_PATTERN.findall(line))
+    if not matches:
+        return False
+    words = len(line.split())
+    return words <= BOILERPLATE_MAX_WORDS or words <= matches * BOILERPLATE_WORDS_PER_MATCH
+
+def block_weight(heading, line, kind):
+    """Relevance weight of one line: relevant sections up, boilerplate and navigation down"""
+    relevant = any(keyword in heading.lower() for keyword in RELEVANT_HEADINGS.get(kind, ()))
+    weight = 3.0 if relevant else 1.0
+    if _is_boilerplate(line):
+        weight *= 0.1
+    elif not relevant and len(line.split()) <= 2 and not _is_heading(line):
+        # Stray one- or two-word lines outside a known section are menus and link lists
+        weight *= 0.2
+    return weight
+
+def _truncate(text, max_tokens):
+    """Cut text to about `max_tokens` at a line (or word) boundary"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit]
+
+def fit_to_budget(text, max_tokens, kind="resume"):
+    """Pack the most relevant sections of `text` into `max_tokens`.
+
+    Returns (text, stats) where stats has "tokens_in", "tokens_out" and
+    "lines_dropped". Lines are ranked by the weight of their section and
+    content, with earlier lines winning ties, and kept in their original
+    order; gaps are marked "[...]".
+    """
+    text = text or ""
+    tokens_in = estimate_tokens(text)
+    if not max_tokens or tokens_in <= max_tokens:
+        return text, {"tokens_in": tokens_in, "tokens_out": tokens_in, "lines_dropped": 0}
+
+    blocks = split_blocks(text)
+    count = len(blocks)
+    # Slight decay with position so the top of a document wins ties
+    weights = [block_weight(heading, line, kind) for heading, line in blocks]
+    ranked = sorted(
+        (index for index in range(count) if weights[index] >= MIN_WEIGHT),
+        key=lambda index: weights[index] * (1 - 0.3 * index / count),
+        reverse=True
+    )
+
+    marker_tokens = estimate_tokens(OMITTED_MARKER) + 1
+    remaining = max_tokens
+    kept = {}
+    for index in ranked:
+        line = blocks[index][1]
+        cost = estimate_tokens(line) + 1
+        if cost + marker_tokens <= remaining:
+            kept[index] = line
+            remaining -= cost
+        elif remaining > 2 * marker_tokens and not kept:
+            # The best line alone exceeds the budget: keep its beginning
+            kept[index] = _truncate(line, remaining - marker_tokens)
+            remaining = 0
+
+    parts = []
+    for index in range(count):
+        if index in kept:
+            parts.append(kept[index])
+        elif not parts or parts[-1] != OMITTED_MARKER:
+            parts.append(OMITTED_MARKER)
+    fitted = "\n".join(parts)
+    tokens_out = estimate_tokens(fitted)
+    return fitted, {"tokens_in": tokens_in, "tokens_out": tokens_out, "lines_dropped": count - len(kept)}
+
+def apply_budgets(prompt_name, budgets, fields):
+    """Fit each budgeted field of a prompt, recording kept and trimmed tokens per prompt and field"""
+    fitted = dict(fields)
+    for field, max_tokens in budgets.items():
+        value = fields.get(field)
+        if not isinstance(value, str) or not max_tokens:
+            continue
+        fitted[field], stats = fit_to_budget(value, max_tokens, FIELD_KINDS.get(field, "resume"))
+        trimmed = stats["tokens_in"] - stats["tokens_out"]
+        PROMPT_BUDGET_TOKENS.inc(stats["tokens_out"], prompt=prompt_name, field=field, outcome="kept")
+        if trimmed > 0:
+            PROMPT_BUDGET_TOKENS.inc(trimmed, prompt=prompt_name, field=field, outcome="trimmed")
+            PROMPT_BUDGET_TRIMS.inc(prompt=prompt_name, field=field)
+    return fitted
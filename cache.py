@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Caching helpers for the HR Candidate Scorer application.
+
+Provides a size-bounded in-process LRU tier and an optional persistent SQLite
+tier so repeated work (e.g. re-uploaded resumes) skips remote AI calls.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+def hash_bytes(content):
+    """Return the SHA-256 hex digest of raw bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+def hash_text(text):
+    """Return the SHA-256 hex digest of a string"""
+    return hash_bytes(text.encode('utf-8'))
+
+class LRUCache:
+    """Thread-safe in-process LRU cache bounded by total size of stored strings, with optional TTL"""
+
+    def __init__(self, max_bytes, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self.current_bytes -= len(value.encode('utf-8'))
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key)[0].encode('utf-8'))
+            self._entries[key] = (value, time.time())
+            self.current_bytes += size
+            # Evict least recently used entries until we fit the size budget
+            while self.current_bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted.encode('utf-8'))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskCache:
+    """Persistent SQLite cache tier that survives process restarts"""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            # Evict least recently accessed rows until we fit the size budget
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while total > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, size FROM cache ORDER BY accessed_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+                total -= row[1]
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+class TieredCache:
+    """In-process LRU tier in front of an optional persistent disk tier, with hit/miss counters"""
+
+    def __init__(self, name, memory_max_bytes, disk_path=None, disk_max_bytes=0, ttl=None):
+        # Note: ttl only applies to the memory tier; disk entries are evicted by size
+        self.name = name
+        self.memory = LRUCache(memory_max_bytes, ttl)
+        self.disk = None
+        if disk_path:
+            try:
+                self.disk = DiskCache(disk_path, disk_max_bytes)
+            except Exception as e:
+                print(f"⚠️  Could not open {name} disk cache at {disk_path}: {str(e)} - using memory only")
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except Exception as e:
+                print(f"⚠️  {self.name} disk cache read failed: {str(e)}")
+                value = None
+            if value is not None:
+                self._count('disk_hits')
+                self.memory.set(key, value)
+                return value
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except Exception as e:
+                print(f"⚠️  {self.name} disk cache write failed: {str(e)}")
+
+    def clear(self):
+        """Drop every cached entry from both tiers"""
+        self.memory.clear()
+        if self.disk is not None:
+            try:
+                self.disk.clear()
+            except Exception as e:
+                print(f"⚠️  {self.name} disk cache clear failed: {str(e)}")
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.current_bytes,
+            "disk_entries": len(self.disk) if self.disk is not None else 0
+        }
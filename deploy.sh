@@ -24,6 +24,7 @@ GCP_REGION=${GCP_REGION:-us-central1}
 GCP_LOCATION=${GCP_LOCATION:-us}
 SERVICE_ACCOUNT_NAME=${SERVICE_ACCOUNT_NAME:-hr-flows-sa}
 GEMINI_MODEL=${GEMINI_MODEL:-gemini-2.5-pro}
+GUNICORN_THREADS=${GUNICORN_THREADS:-32}
 
 echo "🚀 Starting HR Candidate Scorer deployment..."
 echo "Project: $GCP_PROJECT_ID"
@@ -186,8 +187,8 @@ if [ ! -z "$COMPANY_WEBSITE" ]; then
         echo "✅ Company analysis completed successfully"
     else
         echo "⚠️  Company analysis failed - application will use basic scoring"
-        # Remove any partial company_profile.json file
-        rm -f company_profile.json
+        # Remove any partial company_profile.json file and its page hashes
+        rm -f company_profile.json company_profile.pages.json
     fi
 else
     echo "ℹ️  No COMPANY_WEBSITE configured - using basic scoring"
@@ -198,18 +199,43 @@ echo "🔨 Building container image..."
 gcloud builds submit --tag gcr.io/$GCP_PROJECT_ID/$SERVICE_NAME
 
 # Prepare environment variables for Cloud Run
-ENV_VARS="GCP_PROJECT_ID=$GCP_PROJECT_ID,GCP_REGION=$GCP_REGION,GCP_LOCATION=$GCP_LOCATION,GEMINI_MODEL=$GEMINI_MODEL"
+# Entries are "|"-separated (gcloud's ^|^ delimiter syntax) because PROMPT_MODELS and PROMPT_TOKEN_BUDGETS values contain commas
+ENV_VARS="GCP_PROJECT_ID=$GCP_PROJECT_ID|GCP_REGION=$GCP_REGION|GCP_LOCATION=$GCP_LOCATION|GEMINI_MODEL=$GEMINI_MODEL"
 if [ ! -z "$GEMINI_API_KEY" ]; then
-    ENV_VARS="$ENV_VARS,GEMINI_API_KEY=$GEMINI_API_KEY"
+    ENV_VARS="$ENV_VARS|GEMINI_API_KEY=$GEMINI_API_KEY"
 fi
 if [ ! -z "$DOCUMENT_AI_PROCESSOR_ID" ]; then
-    ENV_VARS="$ENV_VARS,DOCUMENT_AI_PROCESSOR_ID=$DOCUMENT_AI_PROCESSOR_ID"
+    ENV_VARS="$ENV_VARS|DOCUMENT_AI_PROCESSOR_ID=$DOCUMENT_AI_PROCESSOR_ID"
 fi
 if [ ! -z "$COMPANY_WEBSITE" ]; then
-    ENV_VARS="$ENV_VARS,COMPANY_WEBSITE=$COMPANY_WEBSITE"
+    ENV_VARS="$ENV_VARS|COMPANY_WEBSITE=$COMPANY_WEBSITE"
 fi
+ENV_VARS="$ENV_VARS|GUNICORN_THREADS=$GUNICORN_THREADS"
+# Caches are held in instance memory. Cloud Run's /tmp is in memory too, so a RESUME_CACHE_PATH under /tmp
+# adds up to RESUME_CACHE_DISK_MB on top of RESUME_CACHE_MEMORY_MB against the --memory limit below.
+for VAR in WEB_CONCURRENCY GUNICORN_TIMEOUT GUNICORN_GRACEFUL_TIMEOUT GUNICORN_KEEPALIVE STAGE_MAX_WORKERS JOB_MAX_WORKERS JOB_RESULT_TTL_SECONDS BATCH_MAX_WORKERS BATCH_MAX_FILES \
+           PROMPT_MODELS GEMINI_FAST_MODEL SCORING_CASCADE CASCADE_BORDERLINE_MIN CASCADE_BORDERLINE_MAX \
+           GEMINI_RPM GEMINI_BURST GEMINI_MAX_CONCURRENCY GEMINI_MIN_CONCURRENCY GEMINI_MAX_ATTEMPTS GEMINI_RETRY_DEADLINE GEMINI_RATE_LIMIT_PATH \
+           CONFIG_RELOAD_INTERVAL PROMPTS_PATH COMPANY_PROFILE_PATH COMPANY_PROFILES_DIR TENANT_CACHE_MAX_MB \
+           MAX_REQUEST_MB MAX_UPLOAD_MB UPLOAD_SPOOL_KB UPLOAD_MEMORY_MB UPLOAD_TMP_DIR \
+           STRUCTURED_OUTPUT STRUCTURED_OUTPUT_REGENERATIONS \
+           RESUME_CACHE_MEMORY_MB RESUME_CACHE_PATH RESUME_CACHE_DISK_MB \
+           SCORING_CACHE_ENABLED SCORING_CACHE_TTL_SECONDS SCORING_CACHE_MAX_MB \
+           JD_MAX_BYTES JD_CACHE_FRESH_SECONDS JD_CACHE_MAX_MB JD_MIN_CHARS \
+           GEMINI_STREAMING GEMINI_CONTEXT_CACHE GEMINI_CONTEXT_CACHE_TTL_SECONDS \
+           PDF_EXTRACTION_MODE PDF_HEDGE_TIMEOUT PDF_HEDGE_MIN_CHARS_PER_PAGE PDF_PARALLEL_MIN_PAGES PDF_MAX_WORKERS \
+           INCLUDE_TIMINGS WARMUP_ON_START \
+           PRESCREEN_TOP_K PRESCREEN_MIN_SCORE \
+           PROMPT_TOKEN_BUDGETS; do
+    if [ ! -z "${!VAR}" ]; then
+        ENV_VARS="$ENV_VARS|$VAR=${!VAR}"
+    fi
+done
 
 # Deploy to Cloud Run
+# /jobs state lives in the instance that accepted the job, so session affinity
+# routes the browser's polling and event stream back to it, and CPU stays
+# allocated so queued jobs keep running after the submitting request returns.
 echo "🚢 Deploying to Cloud Run..."
 gcloud run deploy $SERVICE_NAME \
     --image gcr.io/$GCP_PROJECT_ID/$SERVICE_NAME \
@@ -217,11 +243,14 @@ gcloud run deploy $SERVICE_NAME \
     --region $GCP_REGION \
     --service-account ${SERVICE_ACCOUNT_NAME}@${GCP_PROJECT_ID}.iam.gserviceaccount.com \
     --allow-unauthenticated \
-    --set-env-vars="$ENV_VARS" \
+    --set-env-vars="^|^$ENV_VARS" \
     --memory=1Gi \
     --cpu=1 \
     --timeout=300 \
+    --concurrency=$GUNICORN_THREADS \
     --max-instances=10 \
+    --session-affinity \
+    --no-cpu-throttling \
     --quiet
 
 # Get the service URL
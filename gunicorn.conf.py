@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Gunicorn configuration for the HR Candidate Scorer application.
+
+Analyses spend nearly all their time waiting on Gemini, Document AI and job
+sites, so one process with many threads (gthread) keeps dozens of requests
+in flight without a process per request. In-process state (caches, the
+Gemini context cache handle and /jobs results) is per worker process, so
+keep WEB_CONCURRENCY at 1 unless job polling is routed back to the same
+worker.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+worker_class = "gthread"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Upper bound on one request (Cloud Run's own request timeout is 300s)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+# Time in-flight requests get to finish after SIGTERM (Cloud Run allows 10s)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 10))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Log to stdout/stderr for Cloud Logging
+accesslog = "-"
+errorlog = "-"
+capture_output = True
+
+def post_worker_init(worker):
+    """Import SDKs and build clients in the background once the worker is serving, and watch for config changes"""
+    import main
+    main.start_warm_up()
+    main.start_config_watcher()
+
+def worker_exit(server, worker):
+    """Let queued jobs and batch work drain before the worker process exits"""
+    import main
+    main.shutdown()
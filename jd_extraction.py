@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Job description extraction for the HR Candidate Scorer application.
+
+Job pages usually embed the posting as schema.org `JobPosting` JSON-LD, which
+is found with a regex scan and used without parsing the page. Otherwise the
+page is parsed (with lxml when it is installed) and a readability-style
+heuristic picks the main content block, leaving out menus, footers, cookie
+banners and related-job lists.
+"""
+
+import re
+import json
+import importlib.util
+
+from metrics import JD_EXTRACTIONS
+
+# lxml is several times faster than the pure-Python parser; fall back when it isn't installed
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+JSON_LD_PATTERN = re.compile(
+    rb'<script[^>]+type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Elements that never hold the posting itself
+NON_TEXT_TAGS = ["script", "style", "noscript", "template", "svg", "iframe"]
+STRIP_TAGS = NON_TEXT_TAGS + ["form", "button", "nav", "header", "footer", "aside"]
+# Matched against each class/id token on its own, so wrappers like "has-sidebar" or "layout-with-header" survive
+NEGATIVE_PATTERN = re.compile(
+    r"(?:(?:site|page|global|top|bottom)[-_])?"
+    r"(?:cookie|consent|banner|footer|header|nav|navbar|navigation|menu|sidebar|related|similar|recommend|"
+    r"recommended|share|social|modal|popup|subscribe|newsletter|breadcrumb|comment|promo|advert)s?(?:[-_].*)?",
+    re.IGNORECASE
+)
+POSITIVE_PATTERN = re.compile(
+    r"job[-_]?(description|details|posting|content|body)|description|posting|vacancy|article|main|content",
+    re.IGNORECASE
+)
+BLOCK_TAGS = ["p", "li", "pre", "td", "h1", "h2", "h3", "h4", "dd"]
+# Elements that end a line in the extracted text (inline tags like <b> and <a> don't)
+LINE_TAGS = BLOCK_TAGS + ["div", "section", "ul", "ol", "tr", "table", "dt", "blockquote", "h5", "h6"]
+
+# Main content shorter than this is probably a wrong pick, so the whole page is used instead
+MIN_MAIN_CONTENT_CHARS = 200
+# A boilerplate-looking element holding more than this share of the page text is a layout wrapper, not boilerplate
+MAX_BOILERPLATE_SHARE = 0.5
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces within lines and of blank lines between them"""
+    lines = [re.sub(r'[ \t\r\f\v\xa0\u200b]+', ' ', line).strip() for line in (text or "").split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def parse_html(content):
+    """Parse an HTML document or fragment with the fastest available parser"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, HTML_PARSER)
+
+def element_text(element):
+    """Text of an element with line breaks at block boundaries only, whitespace normalized"""
+    for br in element.find_all("br"):
+        br.replace_with("\n")
+    for block in element.find_all(LINE_TAGS):
+        block.append("\n")
+    return normalize_whitespace(element.get_text())
+
+def _fragment_text(value):
+    """Plain text of a JSON-LD value that may be an HTML fragment, a list or a nested object"""
+    if isinstance(value, list):
+        return "\n".join(filter(None, (_fragment_text(item) for item in value)))
+    if isinstance(value, dict):
+        return _fragment_text(value.get("name") or value.get("description") or "")
+    if not isinstance(value, str):
+        return str(value) if value is not None else ""
+    if '<' in value:
+        return element_text(parse_html(value))
+    return normalize_whitespace(value)
+
+def _json_ld_nodes(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        yield from _json_ld_nodes(data.get("@graph", []))
+
+def find_job_posting(content):
+    """Return the first schema.org JobPosting object embedded as JSON-LD, or None"""
+    for match in JSON_LD_PATTERN.finditer(content):
+        try:
+            data = json.loads(match.group(1).decode('utf-8', errors='replace'), strict=False)
+        except ValueError:
+            continue
+        for node in _json_ld_nodes(data):
+            types = node.get("@type")
+            if "JobPosting" in (types if isinstance(types, list) else [types]) and node.get("description"):
+                return node
+    return None
+
+def _location_text(location):
+    if isinstance(location, list):
+        return "; ".join(filter(None, (_location_text(item) for item in location)))
+    if not isinstance(location, dict):
+        return _fragment_text(location)
+    address = location.get("address", location)
+    if not isinstance(address, dict):
+        return _fragment_text(address)
+    parts = [address.get(key) for key in ("addressLocality", "addressRegion", "addressCountry")]
+    return ", ".join(_fragment_text(part) for part in parts if part)
+
+def job_posting_to_text(posting):
+    """Render a JobPosting as the plain-text job description sent to Gemini"""
+    lines = [_fragment_text(posting.get("title"))]
+    details = [
+        ("Company", _fragment_text(posting.get("hiringOrganization"))),
+        ("Location", _location_text(posting.get("jobLocation"))),
+        ("Remote", "Yes" if posting.get("jobLocationType") == "TELECOMMUTE" else ""),
+        ("Employment type", _fragment_text(posting.get("employmentType"))),
+    ]
+    lines.extend(f"{label}: {value}" for label, value in details if value)
+    lines.extend(["", _fragment_text(posting.get("description"))])
+    for label, key in (("Responsibilities", "responsibilities"), ("Qualifications", "qualifications"),
+                       ("Skills", "skills"), ("Experience", "experienceRequirements"),
+                       ("Education", "educationRequirements")):
+        value = _fragment_text(posting.get(key))
+        if value:
+            lines.extend(["", f"{label}:", value])
+    return normalize_whitespace("\n".join(lines))
+
+def _label_tokens(element):
+    return element.get("class", []) + (element.get("id") or "").split()
+
+def _is_boilerplate(element):
+    tokens = _label_tokens(element)
+    return any(NEGATIVE_PATTERN.fullmatch(token) for token in tokens) and \
+        not POSITIVE_PATTERN.search(" ".join(tokens))
+
+def _strip_boilerplate(soup):
+    for element in soup(STRIP_TAGS):
+        element.decompose()
+    page_length = len((soup.body or soup).get_text(strip=True))
+    for element in soup.find_all(True):
+        if element.decomposed or element.name in ("html", "body", "main", "article"):
+            continue
+        if _is_boilerplate(element) and len(element.get_text(strip=True)) <= page_length * MAX_BOILERPLATE_SHARE:
+            element.decompose()
+
+def _link_density(element):
+    text_length = len(element.get_text()) or 1
+    return sum(len(link.get_text()) for link in element.find_all("a")) / text_length
+
+def find_main_content(soup):
+    """Pick the element most likely to hold the posting, readability-style"""
+    for candidate in soup.find_all(["main", "article"]) + soup.find_all(attrs={"role": "main"}):
+        if len(candidate.get_text(strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            return candidate
+
+    # Each text block scores its parent fully and its grandparent half, by length and comma count
+    scores = {}
+    for block in soup.find_all(BLOCK_TAGS):
+        text = block.get_text(" ", strip=True)
+        if len(text) < 25:
+            continue
+        points = 1 + text.count(',') + min(len(text) // 100, 3)
+        for ancestor, share in ((block.parent, 1.0), (block.parent.parent if block.parent else None, 0.5)):
+            if ancestor is None or ancestor.name in ("html", "[document]"):
+                continue
+            entry = scores.setdefault(id(ancestor), [ancestor, 0.0])
+            entry[1] += points * share
+
+    best, best_score = None, 0.0
+    for element, score in scores.values():
+        if POSITIVE_PATTERN.search(" ".join(_label_tokens(element))):
+            score *= 1.25
+        score *= 1 - _link_density(element)
+        if score > best_score:
+            best, best_score = element, score
+    return best
+
+def extract_job_text(content):
+    """Extract the job description from an HTML page.
+
+    Returns (text, method) where method is "json-ld", "main-content" or
+    "full-page" (when no main content block stands out).
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    posting = find_job_posting(content)
+    if posting is not None:
+        JD_EXTRACTIONS.inc(method="json-ld")
+        return job_posting_to_text(posting), "json-ld"
+
+    soup = parse_html(content)
+    _strip_boilerplate(soup)
+    main = find_main_content(soup)
+    if main is not None:
+        text = element_text(main)
+        if len(text) >= MIN_MAIN_CONTENT_CHARS:
+            JD_EXTRACTIONS.inc(method="main-content")
+            return text, "main-content"
+
+    # Boilerplate stripping may have taken the posting with it, so fall back to the untouched document
+    text = element_text(soup.body or soup)
+    if len(text) < MIN_MAIN_CONTENT_CHARS:
+        soup = parse_html(content)
+        for element in soup(NON_TEXT_TAGS):
+            element.decompose()
+        text = element_text(soup.body or soup)
+    JD_EXTRACTIONS.inc(method="full-page")
+    return text, "full-page"
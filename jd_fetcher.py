@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Job description fetcher for the HR Candidate Scorer application.
+
+Downloads job postings over a shared connection-pooled session, caches the
+extracted text per normalized URL and revalidates it with conditional GETs
+(ETag / Last-Modified) once the freshness window has passed.
+"""
+
+import json
+import time
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from cache import LRUCache
+from jd_extraction import extract_job_text
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """Normalize a URL so equivalent job posting links share one cache entry"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parsed.port}"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, parsed.path or '/', '', query, ''))
+
+class JDFetcher:
+    """Pooled, caching, size-capped fetcher for job description pages"""
+
+    def __init__(self, pool_size=10, timeout=10, max_bytes=2 * 1024 * 1024,
+                 deadline=20, fresh_seconds=300, cache_max_bytes=16 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.fresh_seconds = fresh_seconds
+        self.cache = LRUCache(cache_max_bytes)
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Shared pooled session, created on first use to keep `requests` off the import path"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _download(self, response):
+        """Read a streamed response body, enforcing the byte cap and overall deadline"""
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ValueError(f"Page too large ({declared} bytes, limit is {self.max_bytes})")
+
+        started = time.monotonic()
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= self.max_bytes:
+                print(f"ℹ️  Truncated {response.url} at {self.max_bytes} bytes")
+                break
+            if time.monotonic() - started > self.deadline:
+                raise TimeoutError(f"Download exceeded {self.deadline}s deadline")
+        return b"".join(chunks)[:self.max_bytes]
+
+    def fetch_text(self, url):
+        """Return the extracted text of a job posting, using the cache when possible"""
+        key = normalize_url(url)
+        cached = self.cache.get(key)
+        entry = json.loads(cached) if cached is not None else None
+
+        if entry and time.time() - entry["fetched_at"] < self.fresh_seconds:
+            self._count('hits')
+            return entry["text"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers['If-None-Match'] = entry["etag"]
+            if entry.get("last_modified"):
+                headers['If-Modified-Since'] = entry["last_modified"]
+
+        with self.session.get(url, timeout=self.timeout, headers=headers, stream=True) as response:
+            if entry and response.status_code == 304:
+                # Unchanged since last fetch - extend freshness without downloading or re-parsing
+                self._count('revalidations')
+                entry["fetched_at"] = time.time()
+                self.cache.set(key, json.dumps(entry))
+                return entry["text"]
+
+            response.raise_for_status()
+            content = self._download(response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        self._count('misses')
+        text, _ = extract_job_text(content)
+        self.cache.set(key, json.dumps({
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time()
+        }))
+        return text
+
+    def stats(self):
+        """Return cache counters"""
+        return {
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "entries": len(self.cache),
+            "bytes": self.cache.current_bytes
+        }
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Background job queue for the HR Candidate Scorer application.
+
+Runs analysis pipelines on a worker pool so web requests return a job id
+immediately, and records per-stage progress events that clients can follow
+over Server-Sent Events or by polling.
+"""
+
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class Job:
+    """A single queued analysis and its progress events"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.result = None
+        self.condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    def add_event(self, stage, **data):
+        """Record a progress event and wake any listeners"""
+        with self.condition:
+            started = self.started_at or self.created_at
+            event = {"stage": stage, "elapsed": round(time.time() - started, 3)}
+            event.update(data)
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def finish(self, status, result):
+        with self.condition:
+            self.status = status
+            self.result = result
+            self.finished_at = time.time()
+            self.condition.notify_all()
+
+    def wait_for_events(self, after, timeout):
+        """Block until there are events past index `after` or the job is done"""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.events) > after or self.done, timeout=timeout)
+            return list(self.events[after:]), self.done
+
+    def to_dict(self, include_events=True):
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if include_events:
+            data["events"] = list(self.events)
+        if self.done:
+            data["result"] = self.result
+        return data
+
+class JobManager:
+    """Runs jobs on a bounded worker pool and keeps recent results in memory"""
+
+    def __init__(self, max_workers=4, result_ttl=600):
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue `fn(*args, progress=..., **kwargs)` and return the new Job"""
+        self._prune()
+        job = Job()
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.time()
+        job.status = "running"
+        job.add_event("started")
+        try:
+            result = fn(*args, progress=job.add_event, **kwargs)
+            job.finish("failed" if result.get("error") else "completed", result)
+        except Exception as e:
+            print(f"Job {job.id} failed: {str(e)}")
+            job.finish("failed", {"error": f"Unexpected error: {str(e)}"})
+
+    def _prune(self):
+        """Drop finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
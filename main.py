@@ -1,17 +1,29 @@
 import os
-import requests
-import tempfile
+import importlib
 import json
-import re
 import time
-from flask import Flask, request, render_template, jsonify
-from google.cloud import documentai
-import google.generativeai as genai
-import PyPDF2
-import io
-from bs4 import BeautifulSoup
+import datetime
+import resource
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait as wait_futures
+from flask import Flask, Response, request, render_template, jsonify, stream_with_context, g
 from urllib.parse import urljoin, urlparse
-from utils import analyze_company_profile, extract_company_pages
+from werkzeug.exceptions import RequestEntityTooLarge
+from utils import analyze_company_profile, extract_company_pages, generate_text, IncrementalJSONParser
+from cache import TieredCache, hash_text
+from jd_fetcher import JDFetcher
+from jobs import JobManager
+from pipeline import StageGraph, StageError
+import pdf_extraction
+from pdf_extraction import get_documentai_client, extract_with_documentai, extract_with_pypdf2, extract_hedged
+from prompts import (
+    PROMPTS_PATH, COMPANY_PROFILE_PATH, COMPANY_PROFILES_DIR, get_prompts, get_prompt, get_system_instruction, get_prompt_version,
+    get_token_budgets, get_response_schema, load_company_profile, read_prompts, set_prompts, reload_company_profile
+)
+from tenants import ProfileRegistry, UnknownTenant
+from uploads import MemoryBudget, UploadTooLarge, as_upload, spool_upload
+from structured import StructuredOutputError, generation_config, generate_structured
+from metrics import REGISTRY, REQUEST_DURATION, STAGE_ERRORS, SCORING_TIERS, start_trace, record_stage_timings
 
 app = Flask(__name__)
 
@@ -21,8 +33,50 @@ REGION = os.environ.get('GCP_REGION', 'us-central1')
 LOCATION = os.environ.get('GCP_LOCATION', 'us')
 PROCESSOR_ID = os.environ.get('DOCUMENT_AI_PROCESSOR_ID')
 GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.5-pro')
+GEMINI_FAST_MODEL = os.environ.get('GEMINI_FAST_MODEL', 'gemini-2.5-flash')
+PROMPT_MODELS = dict(
+    entry.split('=', 1) for entry in os.environ.get('PROMPT_MODELS', '').replace(' ', '').split(',') if '=' in entry
+)
+SCORING_CASCADE = os.environ.get('SCORING_CASCADE', 'false').lower() == 'true'
+CASCADE_BORDERLINE_MIN = float(os.environ.get('CASCADE_BORDERLINE_MIN', 5))
+CASCADE_BORDERLINE_MAX = float(os.environ.get('CASCADE_BORDERLINE_MAX', 7))
 COMPANY_WEBSITE = os.environ.get('COMPANY_WEBSITE')
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 200))
+RESUME_CACHE_MEMORY_MB = int(os.environ.get('RESUME_CACHE_MEMORY_MB', 64))
+# Off by default: on Cloud Run the filesystem is in memory, so the disk tier counts against the instance memory limit
+RESUME_CACHE_PATH = os.environ.get('RESUME_CACHE_PATH', '')
+RESUME_CACHE_DISK_MB = int(os.environ.get('RESUME_CACHE_DISK_MB', 64))
+SCORING_CACHE_ENABLED = os.environ.get('SCORING_CACHE_ENABLED', 'false').lower() == 'true'
+SCORING_CACHE_TTL_SECONDS = int(os.environ.get('SCORING_CACHE_TTL_SECONDS', 3600))
+SCORING_CACHE_MAX_MB = int(os.environ.get('SCORING_CACHE_MAX_MB', 32))
+PDF_EXTRACTION_MODE = os.environ.get('PDF_EXTRACTION_MODE', 'fallback').lower()
+PDF_HEDGE_TIMEOUT = float(os.environ.get('PDF_HEDGE_TIMEOUT', 15))
+PDF_HEDGE_MIN_CHARS_PER_PAGE = int(os.environ.get('PDF_HEDGE_MIN_CHARS_PER_PAGE', 200))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 8))
+PDF_MAX_WORKERS = int(os.environ.get('PDF_MAX_WORKERS', 2))
+GEMINI_CONTEXT_CACHE = os.environ.get('GEMINI_CONTEXT_CACHE', 'true').lower() == 'true'
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get('GEMINI_CONTEXT_CACHE_TTL_SECONDS', 3600))
+GEMINI_STREAMING = os.environ.get('GEMINI_STREAMING', 'true').lower() == 'true'
+STAGE_MAX_WORKERS = int(os.environ.get('STAGE_MAX_WORKERS', 64))
+JOB_MAX_WORKERS = int(os.environ.get('JOB_MAX_WORKERS', 4))
+JOB_RESULT_TTL_SECONDS = int(os.environ.get('JOB_RESULT_TTL_SECONDS', 600))
+JD_MAX_BYTES = int(os.environ.get('JD_MAX_BYTES', 2 * 1024 * 1024))
+JD_CACHE_FRESH_SECONDS = int(os.environ.get('JD_CACHE_FRESH_SECONDS', 300))
+JD_CACHE_MAX_MB = int(os.environ.get('JD_CACHE_MAX_MB', 16))
+JD_MIN_CHARS = int(os.environ.get('JD_MIN_CHARS', 50))
+PRESCREEN_TOP_K = int(os.environ.get('PRESCREEN_TOP_K', 0))
+PRESCREEN_MIN_SCORE = float(os.environ.get('PRESCREEN_MIN_SCORE', 0))
+INCLUDE_TIMINGS = os.environ.get('INCLUDE_TIMINGS', 'false').lower() == 'true'
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'true').lower() == 'true'
+CONFIG_RELOAD_INTERVAL = float(os.environ.get('CONFIG_RELOAD_INTERVAL', 5))
+TENANT_CACHE_MAX_MB = int(os.environ.get('TENANT_CACHE_MAX_MB', 64))
+MAX_REQUEST_MB = int(os.environ.get('MAX_REQUEST_MB', 256))
+MAX_UPLOAD_MB = int(os.environ.get('MAX_UPLOAD_MB', 10))
+UPLOAD_SPOOL_KB = int(os.environ.get('UPLOAD_SPOOL_KB', 512))
+UPLOAD_MEMORY_MB = int(os.environ.get('UPLOAD_MEMORY_MB', 64))
+UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR') or None
 
 if not PROJECT_ID:
     raise ValueError("GCP_PROJECT_ID environment variable is required")
@@ -30,57 +84,243 @@ if not PROJECT_ID:
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable is required")
 
-# Initialize Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel(GEMINI_MODEL)
+# Werkzeug rejects larger request bodies with a 413 before reading them
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_MB * 1024 * 1024
+
+# The Gemini SDK dominates import time, so it is imported and configured on first use
+_genai = None
+_models = {}
+_genai_lock = threading.Lock()
+
+def get_genai():
+    """Return the configured google.generativeai module, importing it on first use"""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+def get_model(model_name=None):
+    """Return the Gemini model `model_name` (default GEMINI_MODEL), creating it on first use"""
+    model_name = model_name or GEMINI_MODEL
+    if model_name not in _models:
+        genai = get_genai()
+        with _genai_lock:
+            if model_name not in _models:
+                _models[model_name] = genai.GenerativeModel(model_name)
+    return _models[model_name]
+
+# Shared worker pool for batch scoring - bounds concurrent Gemini calls across requests
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='batch')
+
+# Worker pool running independent pipeline stages (e.g. JD fetch alongside resume analysis)
+stage_executor = ThreadPoolExecutor(max_workers=STAGE_MAX_WORKERS, thread_name_prefix='stage')
+
+# Background worker pool for /jobs submissions
+job_manager = JobManager(max_workers=JOB_MAX_WORKERS, result_ttl=JOB_RESULT_TTL_SECONDS)
+
+# Upload bytes held in memory across all requests; uploads past it spill to disk
+upload_budget = MemoryBudget(UPLOAD_MEMORY_MB * 1024 * 1024)
+
+# Content-addressed cache for resume text extraction and analysis (keyed by upload SHA-256)
+resume_cache = TieredCache(
+    'resume',
+    RESUME_CACHE_MEMORY_MB * 1024 * 1024,
+    RESUME_CACHE_PATH,
+    RESUME_CACHE_DISK_MB * 1024 * 1024
+)
+
+# Shared connection-pooled JD fetcher with per-URL text cache
+jd_fetcher = JDFetcher(
+    pool_size=max(BATCH_MAX_WORKERS, 10),
+    max_bytes=JD_MAX_BYTES,
+    fresh_seconds=JD_CACHE_FRESH_SECONDS,
+    cache_max_bytes=JD_CACHE_MAX_MB * 1024 * 1024
+)
+
+# Opt-in memoization of final scoring results (scoring runs at temperature 0.0)
+scoring_cache = TieredCache(
+    'scoring',
+    SCORING_CACHE_MAX_MB * 1024 * 1024,
+    ttl=SCORING_CACHE_TTL_SECONDS
+) if SCORING_CACHE_ENABLED else None
 
 # Load pre-analyzed company profile (generated during deployment)
-COMPANY_PROFILE = None
-try:
-    if os.path.exists('company_profile.json'):
-        with open('company_profile.json', 'r') as f:
-            COMPANY_PROFILE = json.load(f)
-        print(f"✅ Loaded company profile for enhanced analysis")
+COMPANY_PROFILE = load_company_profile()
+
+def render_scoring_instruction(company_profile, prompts=None):
+    """Static scoring prefix: the scoring instructions with a compact copy of the company profile"""
+    if not company_profile:
+        return None
+    return get_system_instruction(
+        "score_candidate_with_company_context",
+        prompts=prompts,
+        company_profile=json.dumps(company_profile, separators=(',', ':'))
+    )
+
+# Rendered at startup and again whenever prompts.json or company_profile.json is reloaded
+SCORING_SYSTEM_INSTRUCTION = render_scoring_instruction(COMPANY_PROFILE)
+
+# Per-tenant profiles (<tenant>.json in COMPANY_PROFILES_DIR), compiled on first use
+profile_registry = ProfileRegistry(COMPANY_PROFILES_DIR, render_scoring_instruction, TENANT_CACHE_MAX_MB * 1024 * 1024)
+
+def model_for_prompt(prompt_name):
+    """Model a prompt is routed to: PROMPT_MODELS, then the prompt's "model" in prompts.json, then GEMINI_MODEL"""
+    return PROMPT_MODELS.get(prompt_name) or get_prompts().get(prompt_name, {}).get("model") or GEMINI_MODEL
+
+# Per-model scoring models with the static prefix registered: model name -> (model, expires_at)
+_scoring_models = {}
+_scoring_model_lock = threading.Lock()
+
+def _register_scoring_model(genai, model_name, system_instruction, display_name):
+    """Build a scoring model with `system_instruction` as its static prefix, returning (model, expires_at)"""
+    if GEMINI_CONTEXT_CACHE:
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=model_name,
+                display_name=display_name,
+                system_instruction=system_instruction,
+                ttl=datetime.timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+            )
+            print(f"✅ Registered {display_name} prompt prefix with Gemini context caching for {model_name}")
+            # Re-register shortly before the server-side cache expires
+            return genai.GenerativeModel.from_cached_content(cached_content), time.time() + GEMINI_CONTEXT_CACHE_TTL_SECONDS - 60
+        except Exception as e:
+            print(f"ℹ️  Gemini context caching unavailable for {model_name} ({str(e)}) - sending prompt prefix as system instruction")
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction), float('inf')
+
+def get_scoring_model(model_name=None, tenant_profile=None):
+    """Model for company-context scoring with the static prompt prefix pre-registered.
+    
+    The prefix is registered with Gemini context caching when the model supports
+    it (and it meets the minimum cacheable size); otherwise it is sent as the
+    system instruction, which still keeps it as a stable prefix for implicit caching.
+    With `tenant_profile` the tenant's prefix is used and its models are kept
+    on the compiled profile, so they are dropped when it leaves the registry.
+    """
+    model_name = model_name or GEMINI_MODEL
+    genai = get_genai()
+    if tenant_profile is not None:
+        models, lock, display_name = tenant_profile.models, tenant_profile.lock, f'hr-scorer-{tenant_profile.tenant}'
     else:
-        print("ℹ️  No company profile found - using basic scoring")
-except Exception as e:
-    print(f"⚠️  Error loading company profile: {str(e)} - using basic scoring")
-
-PROMPTS = {}
-try:
-    with open('prompts.json', 'r') as f:
-        PROMPTS = json.load(f)
-except Exception as e:
-    print(f"⚠️  Error loading prompts.json: {str(e)}")
-
-def get_prompt(prompt_name, **kwargs):
-    """Get and format a prompt from the loaded prompts."""
-    prompt_template = PROMPTS.get(prompt_name, {}).get("prompt", "")
-    return prompt_template.format(**kwargs)
+        models, lock, display_name = _scoring_models, _scoring_model_lock, 'hr-scorer-company-profile'
+    with lock:
+        scoring_model, expires_at = models.get(model_name, (None, 0))
+        if scoring_model is not None and time.time() < expires_at:
+            return scoring_model
+        # Read the prefix under the lock so a concurrent hot reload can't pair it with stale models
+        system_instruction = tenant_profile.system_instruction if tenant_profile is not None else SCORING_SYSTEM_INSTRUCTION
+        models[model_name] = _register_scoring_model(genai, model_name, system_instruction, display_name)
+        return models[model_name][0]
+
+def config_fingerprint():
+    """Fingerprint of prompts.json and company_profile.json on disk, used to invalidate cached scores"""
+    parts = []
+    for path in (PROMPTS_PATH, COMPANY_PROFILE_PATH):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return "|".join(parts)
+
+_scoring_cache_fingerprint = config_fingerprint()
+_loaded_config_fingerprint = _scoring_cache_fingerprint
+_config_reload_lock = threading.Lock()
+_config_watcher_stop = threading.Event()
+
+def reload_config():
+    """Swap in prompts.json and company_profile.json if either changed on disk.
+    
+    The new prompts, profile and scoring prefix are all prepared before any
+    of them is published, then swapped together under the scoring model lock,
+    so in-flight requests keep the snapshot they started with and new ones
+    see only the new one. A file that fails to parse keeps its loaded copy.
+    Returns True if anything was reloaded.
+    """
+    global COMPANY_PROFILE, SCORING_SYSTEM_INSTRUCTION, _loaded_config_fingerprint
+    with _config_reload_lock:
+        fingerprint = config_fingerprint()
+        if fingerprint == _loaded_config_fingerprint:
+            return False
+        
+        new_prompts = read_prompts(PROMPTS_PATH) or get_prompts()
+        company_profile = reload_company_profile(COMPANY_PROFILE, COMPANY_PROFILE_PATH)
+        system_instruction = render_scoring_instruction(company_profile, new_prompts)
+        with _scoring_model_lock:
+            set_prompts(new_prompts)
+            COMPANY_PROFILE = company_profile
+            SCORING_SYSTEM_INSTRUCTION = system_instruction
+            # Models carry the old prefix (and context cache); rebuild them on next use
+            _scoring_models.clear()
+        # Tenant prefixes were rendered from the old scoring prompt
+        profile_registry.clear()
+        _loaded_config_fingerprint = fingerprint
+    print(f"🔄 Reloaded {PROMPTS_PATH} and {COMPANY_PROFILE_PATH}" + (" (no company profile)" if company_profile is None else ""))
+    return True
+
+def _watch_config():
+    while not _config_watcher_stop.wait(CONFIG_RELOAD_INTERVAL):
+        try:
+            reload_config()
+        except Exception as e:
+            print(f"⚠️  Config reload failed: {str(e)}")
+
+def start_config_watcher():
+    """Poll prompts.json and company_profile.json every CONFIG_RELOAD_INTERVAL seconds and hot-reload changes"""
+    if CONFIG_RELOAD_INTERVAL > 0:
+        threading.Thread(target=_watch_config, name='config-watcher', daemon=True).start()
+
+def _scoring_route(prompt_name):
+    """Models and cascade settings that determine which model produces a score"""
+    if SCORING_CASCADE:
+        return ["cascade", GEMINI_FAST_MODEL, model_for_prompt(prompt_name), CASCADE_BORDERLINE_MIN, CASCADE_BORDERLINE_MAX]
+    return ["single", model_for_prompt(prompt_name)]
+
+def scoring_cache_key(resume_data, jd_text, company_profile=None):
+    """Stable hash of every input that determines a scoring result"""
+    global _scoring_cache_fingerprint
+    fingerprint = config_fingerprint()
+    if fingerprint != _scoring_cache_fingerprint:
+        print("ℹ️  prompts.json or company_profile.json changed - clearing scoring cache")
+        _scoring_cache_fingerprint = fingerprint
+        scoring_cache.clear()
+    
+    prompt_name = "score_candidate_with_company_context" if company_profile else "score_candidate"
+    return hash_text(json.dumps([
+        resume_data,
+        jd_text,
+        company_profile,
+        get_prompts().get(prompt_name, {}),
+        _scoring_route(prompt_name),
+        get_token_budgets(prompt_name),
+        fingerprint
+    ], sort_keys=True))
 
 def extract_text_from_pdf(pdf_content):
     """Extract text from PDF using Document AI or fallback to PyPDF2"""
-    if PROCESSOR_ID:
+    if PROCESSOR_ID and PDF_EXTRACTION_MODE == 'hedged':
+        return extract_hedged(
+            pdf_content, PROJECT_ID, LOCATION, PROCESSOR_ID,
+            timeout=PDF_HEDGE_TIMEOUT,
+            min_chars_per_page=PDF_HEDGE_MIN_CHARS_PER_PAGE,
+            parallel_min_pages=PDF_PARALLEL_MIN_PAGES,
+            max_workers=PDF_MAX_WORKERS
+        )
+    
+    if PROCESSOR_ID and PDF_EXTRACTION_MODE != 'local':
         try:
             # Use Document AI if processor ID is available
-            client = documentai.DocumentProcessorServiceClient()
-            name = client.processor_path(PROJECT_ID, LOCATION, PROCESSOR_ID)
-            
-            raw_document = documentai.RawDocument(content=pdf_content, mime_type="application/pdf")
-            request_doc = documentai.ProcessRequest(name=name, raw_document=raw_document)
-            
-            result = client.process_document(request=request_doc)
-            return result.document.text
+            return extract_with_documentai(pdf_content, PROJECT_ID, LOCATION, PROCESSOR_ID)
         except Exception as e:
             print(f"Document AI failed, falling back to PyPDF2: {str(e)}")
     
     # Fallback to PyPDF2 if Document AI is not available
     try:
-        pdf_file = io.BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+        text, _ = extract_with_pypdf2(pdf_content, PDF_PARALLEL_MIN_PAGES, PDF_MAX_WORKERS)
         return text
     except Exception as e:
         print(f"PyPDF2 extraction failed: {str(e)}")
@@ -103,56 +343,453 @@ def extract_text_from_url(url):
         if hostname == 'localhost' or hostname.startswith('127.') or hostname.startswith('10.') or hostname.startswith('192.168.'):
             return "Error: Access to local or internal addresses is not allowed."
 
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # Simple text extraction (can enhance with BeautifulSoup if needed)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-            
-        return soup.get_text()
+        jd_text = jd_fetcher.fetch_text(url)
     except Exception as e:
         return f"Error extracting from URL: {str(e)}"
+    # An empty page (e.g. a JavaScript-rendered posting) must not be scored as a job description
+    if len(jd_text.strip()) < JD_MIN_CHARS:
+        return f"Error: No job description found at {url}"
+    return jd_text
+
+def _generate_text(prompt_name, prompt, on_chunk=None, generative_model=None):
+    """Generate a deterministic Gemini response (JSON in the prompt's response schema), streaming deltas to `on_chunk` if given"""
+    config = generation_config(get_response_schema(prompt_name), temperature=0.0)
+    return generate_text(generative_model or get_model(model_for_prompt(prompt_name)), prompt_name, prompt, on_chunk, config)
 
-def analyze_resume(resume_text):
+def analyze_resume(resume_text, on_chunk=None):
     """Reuse existing Gemini prompts from backup system"""
     prompt = get_prompt("analyze_resume", resume_text=resume_text)
-    generation_config = genai.types.GenerationConfig(temperature=0.0)
-    response = model.generate_content(prompt, generation_config=generation_config)
-    return response.text
+    return _generate_text("analyze_resume", prompt, on_chunk)
 
 
-def score_candidate_with_company_context(resume_data, jd_text, company_profile=None):
-    """Enhanced scoring with comprehensive company context"""
+def score_candidate_with_company_context(resume_data, jd_text, company_profile=None, on_chunk=None, model_name=None,
+                                         tenant_profile=None):
+    """Enhanced scoring with comprehensive company context.
+    
+    `model_name` overrides the model the scoring prompt is routed to. Pass the
+    compiled `tenant_profile` when `company_profile` comes from the tenant
+    registry so its precompiled prefix and models are reused.
+    """
+    prompt_name = "score_candidate_with_company_context" if company_profile else "score_candidate"
+    model_name = model_name or model_for_prompt(prompt_name)
+    
+    if company_profile and get_prompts().get("score_candidate_with_company_context", {}).get("system_instruction"):
+        # Static instructions + profile go in the system instruction; only candidate and JD are sent per request
+        prompt = get_prompt("score_candidate_with_company_context", resume_data=resume_data, jd_text=jd_text)
+        if tenant_profile is not None and company_profile is tenant_profile.profile:
+            generative_model = get_scoring_model(model_name, tenant_profile)
+        elif company_profile is COMPANY_PROFILE:
+            generative_model = get_scoring_model(model_name)
+        else:
+            generative_model = get_genai().GenerativeModel(model_name, system_instruction=get_system_instruction(
+                "score_candidate_with_company_context",
+                company_profile=json.dumps(company_profile, separators=(',', ':'))
+            ))
+        return _generate_text("score_candidate_with_company_context", prompt, on_chunk, generative_model)
+    
     if company_profile:
         prompt = get_prompt(
-            "score_candidate_with_company_context",
+            prompt_name,
             resume_data=resume_data,
             jd_text=jd_text,
-            company_profile=json.dumps(company_profile, indent=2)
+            company_profile=json.dumps(company_profile, separators=(',', ':'))
         )
     else:
         prompt = get_prompt(
-            "score_candidate",
+            prompt_name,
             resume_data=resume_data,
             jd_text=jd_text
         )
     
-    generation_config = genai.types.GenerationConfig(temperature=0.0)
-    response = model.generate_content(prompt, generation_config=generation_config)
-    return response.text
+    return _generate_text(prompt_name, prompt, on_chunk, get_model(model_name))
 
 def score_candidate(resume_data, jd_text):
     """Legacy function - maintained for backward compatibility"""
     return score_candidate_with_company_context(resume_data, jd_text, None)
 
+def _no_progress(stage, **data):
+    pass
+
+def _fetch_jd_stage(jd_url, progress):
+    """Pipeline stage: download and extract the job description"""
+    jd_text = extract_text_from_url(jd_url)
+    if jd_text.startswith("Error"):
+        raise StageError(jd_text)
+    progress("jd_fetched", characters=len(jd_text))
+    return jd_text
+
+def _extract_resume_stage(filename, upload, content_hash, progress):
+    """Pipeline stage: extract resume text (cached by upload content so repeat uploads skip Document AI)"""
+    if filename.endswith('.pdf'):
+        extraction_key = f"extract:{PDF_EXTRACTION_MODE}:{PROCESSOR_ID or 'pypdf2'}:{content_hash}"
+        resume_text = resume_cache.get(extraction_key)
+        if resume_text is None:
+            resume_text = extract_text_from_pdf(upload.pdf_source)
+            if resume_text:
+                resume_cache.set(extraction_key, resume_text)
+    else:
+        resume_text = upload.read().decode('utf-8')
+    
+    if not resume_text:
+        raise StageError(f"Could not extract text from {filename}")
+    progress("text_extracted", characters=len(resume_text))
+    return resume_text
+
+def _analyze_resume_stage(resume_text, content_hash, progress, stream, cancelled=None):
+    """Pipeline stage: analyze resume with JSON parsing like backup system.
+    
+    `cancelled` is the run's cancel flag; once another stage has failed the
+    Gemini call is skipped, since its result would be thrown away.
+    """
+    # The token budget decides how much of the resume the analysis saw, so budget overrides get their own entries
+    budget_version = hash_text(json.dumps(get_token_budgets('analyze_resume'), sort_keys=True))[:12]
+    analysis_key = f"analysis:{content_hash}:{get_prompt_version('analyze_resume')}:{budget_version}:{model_for_prompt('analyze_resume')}"
+    
+    def generate(attempt):
+        if cancelled is not None and cancelled.is_set():
+            raise StageError("Resume analysis cancelled")
+        # Re-generations aren't streamed, so clients don't see the output twice
+        if stream and attempt == 0:
+            return analyze_resume(resume_text, on_chunk=lambda delta: progress("resume_delta", text=delta))
+        return analyze_resume(resume_text)
+    
+    try:
+        cached = resume_cache.get(analysis_key)
+        cached_analysis = cached is not None
+        if cached_analysis:
+            resume_data = json.loads(cached)
+        else:
+            resume_data = generate_structured("analyze_resume", generate, get_response_schema("analyze_resume"))
+            resume_cache.set(analysis_key, json.dumps(resume_data))
+    except StructuredOutputError:
+        raise StageError("Error parsing resume analysis response")
+    except StageError:
+        raise
+    except Exception as e:
+        print(f"Error analyzing resume: {str(e)}")
+        raise StageError(f"Error analyzing resume: {str(e)}")
+    progress("resume_analyzed", cached=cached_analysis)
+    return resume_data
+
+def _score_with_model(resume_data, jd_text, company_profile, tenant_profile, progress, stream, model_name):
+    """Score once with `model_name`, returning the validated scoring data"""
+    on_chunk = None
+    if stream:
+        scoring_parser = IncrementalJSONParser()
+        
+        def on_chunk(delta):
+            progress("scoring_delta", text=delta)
+            fields = scoring_parser.feed(delta)
+            if fields:
+                progress("scoring_fields", fields=fields)
+    
+    def generate(attempt):
+        return score_candidate_with_company_context(
+            json.dumps(resume_data),
+            jd_text,
+            company_profile,
+            on_chunk=on_chunk if attempt == 0 else None,
+            model_name=model_name,
+            tenant_profile=tenant_profile
+        )
+    
+    prompt_name = "score_candidate_with_company_context" if company_profile else "score_candidate"
+    return generate_structured(prompt_name, generate, get_response_schema(prompt_name))
+
+def _is_borderline(scoring_data):
+    try:
+        return CASCADE_BORDERLINE_MIN <= float(scoring_data.get("overall_score")) <= CASCADE_BORDERLINE_MAX
+    except (TypeError, ValueError):
+        # A first pass without a usable score can't be trusted either
+        return True
+
+def _score_stage(resume_data, jd_text, company_profile, tenant_profile, progress, stream):
+    """Pipeline stage: enhanced candidate scoring with pre-loaded company context.
+    
+    With SCORING_CASCADE the fast model scores first and only borderline
+    candidates are re-scored with the primary model. Returns
+    (scoring_data, model_tier, cache_status).
+    """
+    cache_status = None
+    prompt_name = "score_candidate_with_company_context" if company_profile else "score_candidate"
+    primary_model = model_for_prompt(prompt_name)
+    try:
+        if scoring_cache is not None:
+            scoring_key = scoring_cache_key(resume_data, jd_text, company_profile)
+            cached = scoring_cache.get(scoring_key)
+            cache_status = "HIT" if cached is not None else "MISS"
+            if cached is not None:
+                entry = json.loads(cached)
+                progress("scored", cached=True, tier=entry["model_tier"]["tier"])
+                return entry["scoring"], entry["model_tier"], cache_status
+        
+        if SCORING_CASCADE:
+            scoring_data = _score_with_model(resume_data, jd_text, company_profile, tenant_profile, progress, stream, GEMINI_FAST_MODEL)
+            if _is_borderline(scoring_data):
+                first_pass_score = scoring_data.get("overall_score")
+                progress("scoring_escalated", first_pass_score=first_pass_score, model=primary_model)
+                scoring_data = _score_with_model(resume_data, jd_text, company_profile, tenant_profile, progress, stream, primary_model)
+                model_tier = {"tier": "escalated", "model": primary_model,
+                              "first_pass_model": GEMINI_FAST_MODEL, "first_pass_score": first_pass_score}
+            else:
+                model_tier = {"tier": "fast", "model": GEMINI_FAST_MODEL}
+        else:
+            scoring_data = _score_with_model(resume_data, jd_text, company_profile, tenant_profile, progress, stream, primary_model)
+            model_tier = {"tier": "single", "model": primary_model}
+        
+        SCORING_TIERS.inc(tier=model_tier["tier"])
+        if cache_status == "MISS":
+            scoring_cache.set(scoring_key, json.dumps({"scoring": scoring_data, "model_tier": model_tier}))
+    except StructuredOutputError:
+        raise StageError("Error parsing scoring response")
+    except Exception as e:
+        print(f"Error scoring candidate: {str(e)}")
+        raise StageError(f"Error scoring candidate: {str(e)}")
+    progress("scored", cached=False, tier=model_tier["tier"])
+    return scoring_data, model_tier, cache_status
+
+def process_candidate(filename, resume_content, jd_text=None, progress=None, stream=False, jd_url=None, timings=False,
+                      resume_text=None, resume_data=None, tenant_profile=None):
+    """Run JD extraction, resume extraction, resume analysis and scoring for one candidate.
+    
+    Pass either an already extracted `jd_text` or a `jd_url` to fetch, and
+    optionally an already extracted `resume_text` / analyzed `resume_data`. The JD
+    fetch has no dependency on the resume, so it runs concurrently with resume
+    extraction and analysis; scoring joins both.
+    
+    `progress(stage, **data)` is called as each stage completes. With `stream`
+    set, Gemini output is also forwarded as it is generated: raw text deltas
+    (`resume_delta`, `scoring_delta`) and completed scoring fields
+    (`scoring_fields`) so scores can render before the rationale finishes.
+    
+    Stage wall times and Gemini token usage are recorded in the metrics
+    registry; with `timings` set they are also returned in a `timings` field.
+    
+    `tenant_profile` is a compiled profile from the tenant registry to score
+    against instead of the service's own company profile.
+    
+    `resume_content` is the upload's bytes or a spooled Upload; the caller
+    closes a spooled upload once this returns.
+    """
+    progress = progress or _no_progress
+    trace = start_trace()
+    upload = as_upload(filename, resume_content)
+    content_hash = upload.content_hash
+    trace.upload = {"bytes": upload.size, "storage": upload.storage}
+    # One profile for the whole run, even if a hot reload swaps COMPANY_PROFILE meanwhile
+    company_profile = tenant_profile.profile if tenant_profile is not None else COMPANY_PROFILE
+    
+    graph = StageGraph()
+    if jd_text is None:
+        graph.add("jd", lambda: _fetch_jd_stage(jd_url, progress))
+    else:
+        graph.add("jd", lambda: jd_text)
+    if resume_text is None:
+        graph.add("extract", lambda: _extract_resume_stage(filename, upload, content_hash, progress))
+    else:
+        graph.add("extract", lambda: resume_text)
+    if resume_data is None:
+        graph.add("analyze", lambda extract: _analyze_resume_stage(extract, content_hash, progress, stream, graph.cancelled), deps=("extract",))
+    else:
+        graph.add("analyze", lambda extract: resume_data, deps=("extract",))
+    graph.add("score", lambda jd, analyze: _score_stage(analyze, jd, company_profile, tenant_profile, progress, stream), deps=("jd", "analyze"))
+    
+    try:
+        results, stage_timings = graph.run(stage_executor)
+    except StageError as e:
+        STAGE_ERRORS.inc(stage=getattr(e, 'stage', 'unknown'))
+        return {"error": str(e)}
+    
+    record_stage_timings(stage_timings)
+    print(f"⏱️  Stage timings for {filename}: " + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in stage_timings.items()))
+    
+    jd_text = results["jd"]
+    resume_data = results["analyze"]
+    scoring_data, model_tier, cache_status = results["score"]
+    
+    # Prepare response with enhanced data
+    response_data = {
+        "success": True,
+        "resume_analysis": resume_data,
+        "scoring": scoring_data,
+        "model_tier": model_tier,
+        "jd_preview": jd_text[:500] + "..." if len(jd_text) > 500 else jd_text,
+        "enhanced_analysis": company_profile is not None
+    }
+    
+    if cache_status:
+        response_data["cache"] = cache_status
+    
+    if timings:
+        response_data["timings"] = trace.to_dict()
+    
+    # Include company profile summary if available
+    if company_profile:
+        response_data["company_summary"] = {
+            "industry": company_profile.get("business_intelligence", {}).get("industry_sector", "N/A"),
+            "stage": company_profile.get("growth_stage", {}).get("stage", "N/A"),
+            "culture": company_profile.get("company_culture", {}).get("work_environment", "N/A"),
+            "mission": company_profile.get("company_focus", {}).get("core_mission", "N/A")[:200] + "..." if len(company_profile.get("company_focus", {}).get("core_mission", "")) > 200 else company_profile.get("company_focus", {}).get("core_mission", "N/A")
+        }
+    
+    return response_data
+
+def warm_up():
+    """Import the heavy SDKs and build clients so the first request doesn't pay for them"""
+    started = time.perf_counter()
+    try:
+        get_model()
+        if PROCESSOR_ID and PDF_EXTRACTION_MODE != 'local':
+            get_documentai_client()
+        for module in ('PyPDF2', 'bs4'):
+            importlib.import_module(module)
+        jd_fetcher.session
+        print(f"🔥 Warm-up finished in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"⚠️  Warm-up failed: {str(e)} - clients will be created on first use")
+
+def start_warm_up():
+    """Run warm_up() on a background thread if WARMUP_ON_START is enabled"""
+    if WARMUP_ON_START:
+        threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+def shutdown(wait=True):
+    """Stop accepting background work and let queued jobs and batch candidates finish"""
+    _config_watcher_stop.set()
+    job_manager.shutdown(wait=wait)
+    batch_executor.shutdown(wait=wait)
+    stage_executor.shutdown(wait=wait)
+    pdf_extraction.shutdown(wait=wait)
+
+def analyze_candidate(filename, resume_content):
+    """Extract and analyze one resume without scoring it, for batch pre-screening.
+    
+    Returns (resume_text, resume_data), or an {"error": ...} dict.
+    """
+    upload = as_upload(filename, resume_content)
+    content_hash = upload.content_hash
+    try:
+        resume_text = _extract_resume_stage(filename, upload, content_hash, _no_progress)
+        resume_data = _analyze_resume_stage(resume_text, content_hash, _no_progress, False)
+    except StageError as e:
+        return {"error": str(e)}
+    return resume_text, resume_data
+
+def _overall_score(result):
+    """Numeric overall score of a processed candidate, used for ranking"""
+    try:
+        return float(result.get("scoring", {}).get("overall_score", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def spool_resume(file_storage):
+    """Copy an uploaded resume off the request into a bounded-memory Upload (raises UploadTooLarge)"""
+    return spool_upload(
+        file_storage.filename, file_storage.stream, MAX_UPLOAD_MB * 1024 * 1024,
+        UPLOAD_SPOOL_KB * 1024, upload_budget, UPLOAD_TMP_DIR
+    )
+
+def _process_upload(upload, **kwargs):
+    """Run process_candidate on a spooled upload, deleting it afterwards (for background jobs)"""
+    with upload:
+        return process_candidate(upload.filename, upload, **kwargs)
+
+def _resolve_tenant():
+    """Compiled profile for the request's `tenant` field or X-Tenant header (None if neither is given).
+    
+    Raises UnknownTenant if the tenant has no profile in the registry.
+    """
+    tenant = request.values.get('tenant') or request.headers.get('X-Tenant')
+    if not tenant:
+        return None
+    return profile_registry.get(tenant.strip().lower())
+
+def _wants_timings():
+    """Whether the caller asked for the per-request timing block"""
+    value = request.values.get('timings')
+    if value is None:
+        return INCLUDE_TIMINGS
+    return value.lower() in ('1', 'true', 'yes')
+
+def _collect_cache_metrics():
+    """Expose cache counters to /metrics at scrape time"""
+    caches = [("resume", resume_cache.stats())]
+    if scoring_cache is not None:
+        caches.append(("scoring", scoring_cache.stats()))
+    lookups = []
+    for name, stats in caches:
+        lookups.append(({"cache": name, "result": "memory_hit"}, stats["memory_hits"]))
+        lookups.append(({"cache": name, "result": "disk_hit"}, stats["disk_hits"]))
+        lookups.append(({"cache": name, "result": "miss"}, stats["misses"]))
+    jd_stats = jd_fetcher.stats()
+    for result in ("hits", "revalidations", "misses"):
+        lookups.append(({"cache": "jd", "result": result}, jd_stats[result]))
+    return [
+        ("hr_scorer_cache_lookups_total", "counter", "Cache lookups by cache and result", lookups),
+        ("hr_scorer_cache_entries", "gauge", "Entries held in each in-memory cache tier",
+         [({"cache": name}, stats["memory_entries"]) for name, stats in caches] + [({"cache": "jd"}, jd_stats["entries"])])
+    ]
+
+REGISTRY.add_collector(_collect_cache_metrics)
+
+def _collect_tenant_metrics():
+    stats = profile_registry.stats()
+    return [
+        ("hr_scorer_tenant_profile_lookups_total", "counter", "Tenant profile registry lookups by result",
+         [({"result": "hit"}, stats["hits"]), ({"result": "load"}, stats["misses"])]),
+        ("hr_scorer_tenant_profile_evictions_total", "counter", "Compiled tenant profiles evicted from memory",
+         [({}, stats["evictions"])]),
+        ("hr_scorer_tenant_profiles", "gauge", "Compiled tenant profiles held in memory", [({}, stats["entries"])]),
+        ("hr_scorer_tenant_profile_bytes", "gauge", "Approximate memory held by compiled tenant profiles", [({}, stats["bytes"])]),
+    ]
+
+REGISTRY.add_collector(_collect_tenant_metrics)
+
+def _collect_upload_metrics():
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return [
+        ("hr_scorer_upload_memory_bytes", "gauge", "Upload bytes currently held in memory by in-flight requests",
+         [({}, upload_budget.in_use)]),
+        ("hr_scorer_upload_memory_peak_bytes", "gauge", "Most upload bytes held in memory at once since start",
+         [({}, upload_budget.peak)]),
+        ("hr_scorer_process_peak_rss_bytes", "gauge", "Peak resident set size of this worker process", [({}, peak_rss)]),
+    ]
+
+REGISTRY.add_collector(_collect_upload_metrics)
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _observe_request_duration(response):
+    started = g.get('request_started')
+    if started is not None and request.endpoint != 'metrics':
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown', status=str(response.status_code))
+    return response
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    return jsonify({"error": f"Request too large (maximum is {MAX_REQUEST_MB} MB)"}), 413
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint for request, stage, Gemini and cache metrics"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Expose cache hit/miss counters for sizing"""
+    stats = {"resume": resume_cache.stats(), "jd": jd_fetcher.stats(), "tenants": profile_registry.stats()}
+    if scoring_cache is not None:
+        stats["scoring"] = scoring_cache.stats()
+    return jsonify(stats)
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
@@ -163,78 +800,253 @@ def analyze():
         if not jd_url or not resume_file:
             return jsonify({"error": "Please provide both JD URL and resume file"})
         
+        try:
+            tenant_profile = _resolve_tenant()
+        except UnknownTenant as e:
+            return jsonify({"error": f"Unknown tenant: {e.args[0]}"}), 404
+        
+        try:
+            upload = spool_resume(resume_file)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        
         print(f"Processing file: {resume_file.filename}")
         
-        # Extract JD text
-        jd_text = extract_text_from_url(jd_url)
-        if jd_text.startswith("Error"):
-            return jsonify({"error": jd_text})
+        with upload:
+            result = process_candidate(resume_file.filename, upload, jd_url=jd_url, timings=_wants_timings(),
+                                       tenant_profile=tenant_profile)
+        response = jsonify(result)
+        if result.get("cache"):
+            response.headers['X-Cache'] = result["cache"]
+        return response
         
-        # Extract resume text
-        resume_content = resume_file.read()
-        if resume_file.filename.endswith('.pdf'):
-            resume_text = extract_text_from_pdf(resume_content)
-        else:
-            resume_text = resume_content.decode('utf-8')
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"})
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue an analysis and return its job id immediately"""
+    jd_url = request.form.get('jd_url')
+    resume_file = request.files.get('resume_file')
+    
+    if not jd_url or not resume_file:
+        return jsonify({"error": "Please provide both JD URL and resume file"})
+    
+    try:
+        tenant_profile = _resolve_tenant()
+    except UnknownTenant as e:
+        return jsonify({"error": f"Unknown tenant: {e.args[0]}"}), 404
+    
+    # Stream Gemini output into the job's events unless the client opts out
+    stream = GEMINI_STREAMING and request.form.get('stream', 'true').lower() != 'false'
+    
+    try:
+        upload = spool_resume(resume_file)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    
+    print(f"Queueing file: {resume_file.filename}")
+    job = job_manager.submit(_process_upload, upload,
+                             jd_url=jd_url, stream=stream, timings=_wants_timings(), tenant_profile=tenant_profile)
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Poll a job's status, progress events and (when done) result"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream a job's progress events as Server-Sent Events"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    
+    def generate():
+        sent = 0
+        while True:
+            events, done = job.wait_for_events(sent, timeout=15)
+            for event in events:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            sent += len(events)
+            if done and sent >= len(job.events):
+                yield f"event: complete\ndata: {json.dumps(job.to_dict(include_events=False))}\n\n"
+                return
+            if not events:
+                # Keep the connection alive through proxies while a slow stage runs
+                yield ": keep-alive\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Score many resumes against one JD, streaming results as NDJSON"""
+    try:
+        jd_url = request.form.get('jd_url')
+        resume_files = [f for f in request.files.getlist('resume_files') if f and f.filename]
+        
+        if not jd_url or not resume_files:
+            return jsonify({"error": "Please provide a JD URL and at least one resume file"})
         
-        if not resume_text:
-            return jsonify({"error": f"Could not extract text from {resume_file.filename}"})
+        if len(resume_files) > BATCH_MAX_FILES:
+            return jsonify({"error": f"Too many resume files (maximum is {BATCH_MAX_FILES})"})
         
-        # Analyze resume with JSON parsing like backup system
         try:
-            resume_response = analyze_resume(resume_text)
-            # Clean the response to ensure it's valid JSON
-            cleaned_response = re.sub(r'```json\s*|\s*```', '', resume_response).strip()
-            resume_data = json.loads(cleaned_response)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding resume analysis JSON: {e}")
-            print(f"Raw response was: {resume_response}")
-            return jsonify({"error": "Error parsing resume analysis response"})
-        except Exception as e:
-            print(f"Error analyzing resume: {str(e)}")
-            return jsonify({"error": f"Error analyzing resume: {str(e)}"})
-
-        # Enhanced candidate scoring with pre-loaded company context
+            top_k = int(request.form.get('top_k', PRESCREEN_TOP_K))
+            min_score = float(request.form.get('min_score', PRESCREEN_MIN_SCORE))
+        except ValueError:
+            return jsonify({"error": "top_k must be an integer and min_score a number"})
+        
         try:
-            scoring_response = score_candidate_with_company_context(
-                json.dumps(resume_data),
-                jd_text,
-                COMPANY_PROFILE  # Use pre-loaded company profile
-            )
-            # Clean the response to ensure it's valid JSON
-            cleaned_scoring_response = re.sub(r'```json\s*|\s*```', '', scoring_response).strip()
-            scoring_data = json.loads(cleaned_scoring_response)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding scoring JSON: {e}")
-            print(f"Raw response was: {scoring_response}")
-            return jsonify({"error": "Error parsing scoring response"})
-        except Exception as e:
-            print(f"Error scoring candidate: {str(e)}")
-            return jsonify({"error": f"Error scoring candidate: {str(e)}"})
-        
-        # Prepare response with enhanced data
-        response_data = {
-            "success": True,
-            "resume_analysis": resume_data,
-            "scoring": scoring_data,
-            "jd_preview": jd_text[:500] + "..." if len(jd_text) > 500 else jd_text,
-            "enhanced_analysis": COMPANY_PROFILE is not None
-        }
+            tenant_profile = _resolve_tenant()
+        except UnknownTenant as e:
+            return jsonify({"error": f"Unknown tenant: {e.args[0]}"}), 404
         
-        # Include company profile summary if available
-        if COMPANY_PROFILE:
-            response_data["company_summary"] = {
-                "industry": COMPANY_PROFILE.get("business_intelligence", {}).get("industry_sector", "N/A"),
-                "stage": COMPANY_PROFILE.get("growth_stage", {}).get("stage", "N/A"),
-                "culture": COMPANY_PROFILE.get("company_culture", {}).get("work_environment", "N/A"),
-                "mission": COMPANY_PROFILE.get("company_focus", {}).get("core_mission", "N/A")[:200] + "..." if len(COMPANY_PROFILE.get("company_focus", {}).get("core_mission", "")) > 200 else COMPANY_PROFILE.get("company_focus", {}).get("core_mission", "N/A")
-            }
+        print(f"Processing batch of {len(resume_files)} files")
         
-        return jsonify(response_data)
+        # Fetch the JD once for the whole batch
+        jd_text = extract_text_from_url(jd_url)
+        if jd_text.startswith("Error"):
+            return jsonify({"error": jd_text})
+        
+        # Spool uploads and read options while the request is still active
+        uploads = []
+        try:
+            for f in resume_files:
+                uploads.append(spool_resume(f))
+        except UploadTooLarge as e:
+            for upload in uploads:
+                upload.close()
+            return jsonify({"error": str(e)}), 413
+        candidates = [(upload.filename, upload) for upload in uploads]
+        timings = _wants_timings()
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return jsonify({"error": f"Unexpected error: {str(e)}"})
+    
+    submitted = []
+    
+    def close_uploads():
+        for upload in uploads:
+            upload.close()
+
+    def candidate_line(index, filename, result):
+        return json.dumps({"type": "candidate", "index": index, "filename": filename, "result": result}) + "\n"
+    
+    def generate():
+        try:
+            yield from stream_results()
+        finally:
+            # The client may have gone away: drop queued candidates so they don't spend Gemini quota,
+            # and let running ones finish before close_uploads() deletes the files they read
+            for future in submitted:
+                future.cancel()
+            wait_futures(submitted)
+    
+    def stream_results():
+        results = []
+        prescreen = {}
+        prepared = {}
+        
+        if top_k > 0 or min_score > 0:
+            # Extract and analyze everyone first, then only score the best lexical matches
+            from prescreen import candidate_document, rank_candidates, select_candidates
+            
+            futures = {
+                batch_executor.submit(analyze_candidate, filename, content): (index, filename)
+                for index, (filename, content) in enumerate(candidates)
+            }
+            submitted.extend(futures)
+            for future in as_completed(futures):
+                index, filename = futures[future]
+                try:
+                    analyzed = future.result()
+                except Exception as e:
+                    print(f"Unexpected error processing {filename}: {str(e)}")
+                    analyzed = {"error": f"Unexpected error: {str(e)}"}
+                if isinstance(analyzed, dict):
+                    results.append((index, filename, analyzed))
+                    yield candidate_line(index, filename, analyzed)
+                else:
+                    prepared[index] = analyzed
+            
+            pool = sorted(prepared)
+            ranking = rank_candidates(jd_text, [candidate_document(*prepared[index]) for index in pool])
+            selected = {pool[position] for position in select_candidates(ranking, top_k, min_score)}
+            prescreen = {index: entry for index, entry in zip(pool, ranking)}
+            print(f"🔎 Pre-screening kept {len(selected)} of {len(pool)} candidates for scoring")
+            
+            for index in pool:
+                if index not in selected:
+                    result = {"screened_out": True, "resume_analysis": prepared[index][1], "prescreen": prescreen[index]}
+                    results.append((index, candidates[index][0], result))
+                    yield candidate_line(index, candidates[index][0], result)
+            to_score = sorted(selected)
+        else:
+            to_score = range(len(candidates))
+        
+        futures = {}
+        for index in to_score:
+            filename, content = candidates[index]
+            resume_text, resume_data = prepared.get(index, (None, None))
+            future = batch_executor.submit(process_candidate, filename, content, jd_text, timings=timings,
+                                           resume_text=resume_text, resume_data=resume_data, tenant_profile=tenant_profile)
+            futures[future] = (index, filename)
+            submitted.append(future)
+        for future in as_completed(futures):
+            index, filename = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Unexpected error processing {filename}: {str(e)}")
+                result = {"error": f"Unexpected error: {str(e)}"}
+            if index in prescreen:
+                result["prescreen"] = prescreen[index]
+            results.append((index, filename, result))
+            yield candidate_line(index, filename, result)
+        
+        # Rank successful candidates by overall score
+        scored = sorted(
+            (r for r in results if r[2].get("success")),
+            key=lambda r: _overall_score(r[2]),
+            reverse=True
+        )
+        screened_out = sum(1 for r in results if r[2].get("screened_out"))
+        summary = {
+            "type": "summary",
+            "total": len(results),
+            "succeeded": len(scored),
+            "screened_out": screened_out,
+            "failed": len(results) - len(scored) - screened_out,
+            "ranking": [
+                {
+                    "rank": rank,
+                    "index": index,
+                    "filename": filename,
+                    "name": result["resume_analysis"].get("name"),
+                    "overall_score": result["scoring"].get("overall_score"),
+                    "recommendation": result["scoring"].get("recommendation")
+                }
+                for rank, (index, filename, result) in enumerate(scored, start=1)
+            ]
+        }
+        yield json.dumps(summary) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Runs once the stream is finished or the client has gone away
+    response.call_on_close(close_uploads)
+    return response
 
 if __name__ == '__main__':
+    start_warm_up()
+    start_config_watcher()
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))
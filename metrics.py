@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for the HR Candidate Scorer application.
+
+Counters and latency histograms are rendered in the Prometheus text format
+for the /metrics endpoint. A per-request trace (held in a context variable)
+collects stage timings and Gemini token usage for the optional timing block
+in API responses.
+"""
+
+import time
+import bisect
+import threading
+import contextvars
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, "") for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labels, key), value) for key, value in sorted(self._values.items())]
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, "") for label in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else repr(float(bound))
+                    labels = _format_labels(self.labels + ("le",), key + (le,))
+                    samples.append((f"{self.name}_bucket", labels, cumulative))
+                labels = _format_labels(self.labels, key)
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+class Registry:
+    """Collection of metrics plus callbacks for values computed at scrape time"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Register `collector()` returning [(name, type, help, [(labels_dict, value), ...]), ...]"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {str(e)}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "hr_scorer_request_duration_seconds", "HTTP request latency until the response is returned", ("endpoint", "status"))
+STAGE_DURATION = REGISTRY.histogram(
+    "hr_scorer_stage_duration_seconds", "Wall time of each analysis pipeline stage", ("stage",))
+STAGE_ERRORS = REGISTRY.counter(
+    "hr_scorer_stage_errors_total", "Pipeline runs aborted by an error, by stage", ("stage",))
+GEMINI_DURATION = REGISTRY.histogram(
+    "hr_scorer_gemini_request_duration_seconds", "Gemini generate_content latency by prompt", ("prompt",))
+GEMINI_TOKENS = REGISTRY.counter(
+    "hr_scorer_gemini_tokens_total", "Gemini tokens by prompt and direction", ("prompt", "direction"))
+GEMINI_ERRORS = REGISTRY.counter(
+    "hr_scorer_gemini_errors_total", "Failed Gemini calls by prompt", ("prompt",))
+GEMINI_RETRIES = REGISTRY.counter(
+    "hr_scorer_gemini_retries_total", "Gemini calls retried by the rate limiter, by prompt and reason", ("prompt", "reason"))
+PROMPT_BUDGET_TOKENS = REGISTRY.counter(
+    "hr_scorer_prompt_budget_tokens_total", "Estimated prompt input tokens kept or trimmed by the token budget",
+    ("prompt", "field", "outcome"))
+PROMPT_BUDGET_TRIMS = REGISTRY.counter(
+    "hr_scorer_prompt_budget_trims_total", "Prompt inputs that exceeded their token budget and were trimmed", ("prompt", "field"))
+JD_EXTRACTIONS = REGISTRY.counter(
+    "hr_scorer_jd_extractions_total", "Job description pages extracted, by method (json-ld, main-content, full-page)", ("method",))
+UPLOAD_BYTES = REGISTRY.histogram(
+    "hr_scorer_upload_bytes", "Size of accepted resume uploads, by where they were held (memory, disk)", ("storage",),
+    buckets=(16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2))
+STRUCTURED_OUTPUTS = REGISTRY.counter(
+    "hr_scorer_structured_outputs_total",
+    "Gemini JSON replies by how they were recovered (parsed, extracted, repaired, invalid, regenerated)", ("prompt", "outcome"))
+SCORING_TIERS = REGISTRY.counter(
+    "hr_scorer_scoring_tier_total", "Scores by the model tier that produced them (single, fast, escalated)", ("tier",))
+
+_current_trace = contextvars.ContextVar('hr_scorer_trace', default=None)
+
+class RequestTrace:
+    """Timing and token usage collected while serving one analysis"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.gemini = {}
+        self.upload = None
+        self._lock = threading.Lock()
+
+    def add_gemini(self, prompt_name, seconds, input_tokens, output_tokens):
+        with self._lock:
+            entry = self.gemini.setdefault(prompt_name, {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0})
+            entry["calls"] += 1
+            entry["seconds"] = round(entry["seconds"] + seconds, 3)
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+
+    def to_dict(self):
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "gemini": dict(self.gemini),
+            "upload": self.upload
+        }
+
+def start_trace():
+    """Begin a trace for the current context and return it"""
+    trace = RequestTrace()
+    _current_trace.set(trace)
+    return trace
+
+def current_trace():
+    return _current_trace.get()
+
+def record_stage_timings(timings):
+    """Record pipeline stage wall times in the histogram and current trace"""
+    trace = current_trace()
+    for stage, seconds in timings.items():
+        STAGE_DURATION.observe(seconds, stage=stage)
+        if trace is not None:
+            trace.stages[stage] = seconds
+
+def record_gemini_call(prompt_name, seconds, usage_metadata=None):
+    """Record latency and token usage of one Gemini call"""
+    input_tokens = getattr(usage_metadata, 'prompt_token_count', 0) or 0
+    output_tokens = getattr(usage_metadata, 'candidates_token_count', 0) or 0
+    GEMINI_DURATION.observe(seconds, prompt=prompt_name)
+    GEMINI_TOKENS.inc(input_tokens, prompt=prompt_name, direction="input")
+    GEMINI_TOKENS.inc(output_tokens, prompt=prompt_name, direction="output")
+    trace = current_trace()
+    if trace is not None:
+        trace.add_gemini(prompt_name, seconds, input_tokens, output_tokens)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+PDF text extraction for the HR Candidate Scorer application.
+
+Document AI is used when a processor is configured, through one long-lived
+client. Local extraction uses PyPDF2, splitting large documents across
+worker processes. In "hedged" mode both run at once and the first result
+that is good enough wins. Both SDKs are imported on first use to keep
+them off the web app's startup path.
+
+Every extractor takes the PDF as bytes or as the path of a spooled upload;
+local extraction memory-maps a path rather than reading it into memory.
+"""
+
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from uploads import open_pdf_stream, read_source
+
+_client = None
+_client_lock = threading.Lock()
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+# Threads for running Document AI and local extraction side by side in hedged mode
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='pdf-hedge')
+
+def get_documentai_client():
+    """Return the shared Document AI client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import documentai
+                _client = documentai.DocumentProcessorServiceClient()
+    return _client
+
+def extract_with_documentai(pdf_content, project_id, location, processor_id):
+    """Extract text with the configured Document AI processor"""
+    from google.cloud import documentai
+    client = get_documentai_client()
+    name = client.processor_path(project_id, location, processor_id)
+
+    # The request proto needs the bytes inline, so a spooled upload is read here, once
+    raw_document = documentai.RawDocument(content=read_source(pdf_content), mime_type="application/pdf")
+    request_doc = documentai.ProcessRequest(name=name, raw_document=raw_document)
+
+    result = client.process_document(request=request_doc)
+    return result.document.text
+
+def _extract_page_range(pdf_content, start, stop):
+    """Extract text from pages [start, stop) - runs in a worker process"""
+    import PyPDF2
+    with open_pdf_stream(pdf_content) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def _get_process_pool(max_workers):
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                # Forking a threaded worker that holds gRPC state can deadlock the child, so start clean interpreters
+                _process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+def shutdown(wait=True):
+    """Stop the hedging threads and the local extraction worker processes"""
+    global _process_pool
+    _hedge_executor.shutdown(wait=wait)
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=wait, cancel_futures=not wait)
+            _process_pool = None
+
+def extract_with_pypdf2(pdf_content, parallel_min_pages=8, max_workers=4):
+    """Extract text locally with PyPDF2.
+
+    PyPDF2 is pure Python, so threads would just contend for the GIL; large
+    documents are instead split into page ranges across worker processes.
+    Workers are handed the file path of a spooled upload rather than a
+    pickled copy of its bytes. Returns (text, page_count).
+    """
+    import PyPDF2
+    with open_pdf_stream(pdf_content) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        page_count = len(reader.pages)
+
+        if page_count < parallel_min_pages or max_workers < 2:
+            pages = [page.extract_text() or "" for page in reader.pages]
+            return "\n".join(pages), page_count
+
+    pool = _get_process_pool(max_workers)
+    chunk_size = -(-page_count // max_workers)
+    futures = [
+        pool.submit(_extract_page_range, pdf_content, start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+    pages = [text for future in futures for text in future.result()]
+    return "\n".join(pages), page_count
+
+def _good_enough(text, page_count, min_chars_per_page):
+    """Whether local extraction looks complete (scanned PDFs yield little or no text)"""
+    return bool(text) and len(text.strip()) >= min_chars_per_page * max(page_count, 1)
+
+def extract_hedged(pdf_content, project_id, location, processor_id,
+                   timeout=15, min_chars_per_page=200, parallel_min_pages=8, max_workers=4):
+    """Run Document AI and local extraction concurrently and return the first acceptable text.
+
+    Local text wins as soon as it meets the quality threshold; otherwise we
+    wait up to `timeout` seconds for Document AI and fall back to whatever
+    local extraction produced.
+    """
+    deadline = time.monotonic() + timeout
+    docai = _hedge_executor.submit(extract_with_documentai, pdf_content, project_id, location, processor_id)
+    local = _hedge_executor.submit(extract_with_pypdf2, pdf_content, parallel_min_pages, max_workers)
+
+    done, _ = wait([docai, local], timeout=timeout, return_when=FIRST_COMPLETED)
+    local_text = ""
+    if local in done:
+        try:
+            local_text, page_count = local.result()
+            if _good_enough(local_text, page_count, min_chars_per_page):
+                return local_text
+        except Exception as e:
+            print(f"PyPDF2 extraction failed: {str(e)}")
+
+    try:
+        docai_text = docai.result(timeout=max(0, deadline - time.monotonic()))
+        if docai_text:
+            return docai_text
+    except Exception as e:
+        print(f"Document AI failed or timed out in hedged mode: {str(e) or type(e).__name__}")
+
+    # Document AI failed or came back empty, so local extraction is all that's left
+    if local not in done:
+        try:
+            local_text, _ = local.result()
+        except Exception as e:
+            print(f"PyPDF2 extraction failed: {str(e)}")
+    return local_text
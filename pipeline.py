@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Stage graph runner for the HR Candidate Scorer analysis pipeline.
+
+Stages declare the stages they depend on; independent stages run
+concurrently and each stage's wall time is recorded.
+"""
+
+import time
+import threading
+import contextvars
+from concurrent.futures import wait, FIRST_COMPLETED
+
+class StageError(Exception):
+    """Raised by a stage to abort the pipeline with a user-facing error message"""
+
+class StageGraph:
+    """Dependency graph of named pipeline stages"""
+
+    def __init__(self):
+        self._stages = {}
+        # Set when a stage fails, so stages still running can skip expensive calls nobody will use
+        self.cancelled = threading.Event()
+
+    def add(self, name, fn, deps=()):
+        """Register `fn(**dependency_results)` as stage `name`"""
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self._stages[name] = (fn, tuple(deps))
+
+    @staticmethod
+    def _timed(fn, kwargs):
+        started = time.perf_counter()
+        value = fn(**kwargs)
+        return value, time.perf_counter() - started
+
+    def run(self, executor):
+        """Run every stage as soon as its dependencies finish.
+
+        Returns (results, timings) keyed by stage name. The first stage to
+        raise aborts the run: `cancelled` is set, stages not yet started are
+        cancelled, stages already running are waited for (they may still be
+        using the caller's resources, such as a spooled upload), and then the
+        exception propagates to the caller with the failing stage name set
+        as its `stage` attribute.
+        """
+        results = {}
+        timings = {}
+        pending = dict(self._stages)
+        running = {}
+
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            for name in ready:
+                fn, deps = pending.pop(name)
+                kwargs = {dep: results[dep] for dep in deps}
+                # Run each stage in a copy of the caller's context so per-request state follows it
+                context = contextvars.copy_context()
+                running[executor.submit(context.run, self._timed, fn, kwargs)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception as e:
+                    self.cancelled.set()
+                    for other in running:
+                        other.cancel()
+                    wait(running)
+                    e.stage = name
+                    raise
+
+        return results, timings
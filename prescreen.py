@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Local lexical pre-screening for the HR Candidate Scorer application.
+
+Candidates in a batch are ranked against the job description with BM25 over
+their extracted resume text plus the `skills` and `summary` fields from
+resume analysis, so only the most relevant ones need an LLM scoring call.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOP_WORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could did do does
+for from had has have he her his how i if in into is it its may me more most my no not of on
+or our out over she should so some such than that the their them then there these they this
+those through to too under up very was we were what when where which while who will with
+would you your yours
+""".split())
+
+# Analysis fields repeated into the document so they outweigh incidental mentions in the raw text
+FIELD_WEIGHTS = {"skills": 2, "summary": 1}
+
+def tokenize(text):
+    """Lowercase word tokens, keeping technology names like c++, c# and node.js intact"""
+    return [
+        token for token in TOKEN_PATTERN.findall((text or "").lower())
+        if token not in STOP_WORDS and not token.isdigit()
+    ]
+
+def _field_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return " ".join(_field_text(item) for item in value)
+    if isinstance(value, dict):
+        return " ".join(_field_text(item) for item in value.values())
+    return ""
+
+def candidate_document(resume_text, resume_data=None):
+    """Text indexed for one candidate: raw resume text plus weighted analysis fields"""
+    parts = [resume_text or ""]
+    for field, weight in FIELD_WEIGHTS.items():
+        text = _field_text((resume_data or {}).get(field))
+        parts.extend([text] * weight)
+    return "\n".join(parts)
+
+class BM25Index:
+    """Okapi BM25 over a fixed pool of documents, backed by a NumPy term-frequency matrix"""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        tokenized = [Counter(tokenize(document)) for document in documents]
+        self.vocabulary = {term: column for column, term in enumerate(sorted(set().union(*tokenized)))}
+
+        tf = np.zeros((len(tokenized), len(self.vocabulary)), dtype=np.float32)
+        for row, counts in enumerate(tokenized):
+            if counts:
+                columns = [self.vocabulary[term] for term in counts]
+                tf[row, columns] = list(counts.values())
+
+        lengths = tf.sum(axis=1)
+        average_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        document_frequency = np.count_nonzero(tf, axis=0)
+        self.k1 = k1
+        self.tf = tf
+        self.idf = np.log1p((len(tokenized) - document_frequency + 0.5) / (document_frequency + 0.5))
+        self.norm = (k1 * (1 - b + b * lengths / average_length))[:, None]
+
+    def __len__(self):
+        return self.tf.shape[0]
+
+    def score(self, query):
+        """BM25 score of every document for `query` (each distinct query term counted once)"""
+        columns = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+        if not columns:
+            return np.zeros(len(self), dtype=np.float32)
+        # Only the query's columns are weighted, so scoring costs O(documents x query terms)
+        tf = self.tf[:, columns]
+        return (self.idf[columns] * tf * (self.k1 + 1) / (tf + self.norm)).sum(axis=1)
+
+def rank_candidates(jd_text, documents):
+    """Rank documents against a JD.
+
+    Returns one {"score", "relative_score", "rank"} dict per document, in input
+    order. `relative_score` is the score divided by the best score in the pool.
+    """
+    if not documents:
+        return []
+    scores = BM25Index(documents).score(jd_text)
+    best = float(scores.max())
+    order = np.argsort(-scores, kind='stable')
+    ranks = np.empty(len(scores), dtype=int)
+    ranks[order] = np.arange(1, len(scores) + 1)
+    return [
+        {
+            "score": round(float(score), 4),
+            "relative_score": round(float(score) / best, 4) if best > 0 else 0.0,
+            "rank": int(rank)
+        }
+        for score, rank in zip(scores, ranks)
+    ]
+
+def select_candidates(ranking, top_k=0, min_score=0.0):
+    """Indices of ranked candidates to send to LLM scoring.
+
+    Keeps candidates within the first `top_k` ranks (0 for no limit) whose
+    relative score is at least `min_score`.
+    """
+    return {
+        index for index, entry in enumerate(ranking)
+        if (top_k <= 0 or entry["rank"] <= top_k) and entry["relative_score"] >= min_score
+    }
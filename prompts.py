@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Shared prompt and company profile loading for the HR Candidate Scorer application.
+
+`prompts.json` is read once per process on first use and shared by the web
+app, the deploy-time company analysis and the utilities. Free-text inputs
+are fitted to the prompt's `token_budget` before formatting. Both files can
+be reloaded while the server runs; they are written atomically and a file
+that fails to parse never replaces the loaded copy.
+"""
+
+import os
+import json
+import tempfile
+import threading
+
+from cache import hash_text
+from budget import apply_budgets
+
+PROMPTS_PATH = os.environ.get('PROMPTS_PATH', 'prompts.json')
+COMPANY_PROFILE_PATH = os.environ.get('COMPANY_PROFILE_PATH', 'company_profile.json')
+# Per-tenant profiles, <tenant>.json, for serving several companies from one service
+COMPANY_PROFILES_DIR = os.environ.get('COMPANY_PROFILES_DIR', 'profiles')
+# Per-field token budget overrides, e.g. "analyze_resume.resume_text=4000,score_candidate.jd_text=2000"
+PROMPT_TOKEN_BUDGETS = {
+    key: int(value) for key, value in (
+        entry.split('=', 1) for entry in os.environ.get('PROMPT_TOKEN_BUDGETS', '').replace(' ', '').split(',') if '=' in entry
+    )
+}
+
+_prompts = None
+_prompts_lock = threading.Lock()
+
+def load_prompts(path=PROMPTS_PATH):
+    """Read prompt templates from disk, returning {} if the file can't be loaded"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️  Error loading {path}: {str(e)}")
+        return {}
+
+def get_prompts():
+    """Return the loaded prompt templates, reading prompts.json on first use"""
+    global _prompts
+    if _prompts is None:
+        with _prompts_lock:
+            if _prompts is None:
+                _prompts = load_prompts()
+    return _prompts
+
+def read_prompts(path=PROMPTS_PATH):
+    """Read prompts.json for a hot reload, returning None (and keeping the loaded prompts) if it doesn't parse"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️  Keeping the loaded prompts - {path} could not be reloaded: {str(e)}")
+        return None
+
+def set_prompts(prompts):
+    """Publish new prompt templates in one reference swap, so readers see the old or the new set, never a mix"""
+    global _prompts
+    _prompts = prompts
+
+def get_token_budgets(prompt_name):
+    """Token budget per input field of a prompt: prompts.json "token_budget" with PROMPT_TOKEN_BUDGETS overrides"""
+    budgets = dict(get_prompts().get(prompt_name, {}).get("token_budget", {}))
+    for key, max_tokens in PROMPT_TOKEN_BUDGETS.items():
+        name, _, field = key.partition('.')
+        if name == prompt_name and field:
+            budgets[field] = max_tokens
+    return budgets
+
+def get_response_schema(prompt_name):
+    """JSON schema a prompt's reply must follow (prompts.json "response_schema"), or None"""
+    return get_prompts().get(prompt_name, {}).get("response_schema")
+
+def get_prompt(prompt_name, **kwargs):
+    """Get and format a prompt from the loaded prompts, fitting inputs to its token budget."""
+    prompt_template = get_prompts().get(prompt_name, {}).get("prompt", "")
+    budgets = get_token_budgets(prompt_name)
+    if budgets:
+        kwargs = apply_budgets(prompt_name, budgets, kwargs)
+    return prompt_template.format(**kwargs)
+
+def get_system_instruction(prompt_name, prompts=None, **kwargs):
+    """Get and format the static system instruction of a prompt, if it defines one."""
+    template = (prompts or get_prompts()).get(prompt_name, {}).get("system_instruction")
+    return template.format(**kwargs) if template else None
+
+def get_prompt_version(prompt_name):
+    """Short content hash of a prompt template, used to invalidate cached results"""
+    return hash_text(json.dumps(get_prompts().get(prompt_name, {}), sort_keys=True))[:12]
+
+def load_company_profile(path=COMPANY_PROFILE_PATH):
+    """Load the pre-analyzed company profile (generated during deployment), or None"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                profile = json.load(f)
+            print(f"✅ Loaded company profile for enhanced analysis")
+            return profile
+        print("ℹ️  No company profile found - using basic scoring")
+    except Exception as e:
+        print(f"⚠️  Error loading company profile: {str(e)} - using basic scoring")
+    return None
+
+def reload_company_profile(current=None, path=COMPANY_PROFILE_PATH):
+    """Re-read the company profile: None if the file was removed, `current` if it doesn't parse"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️  Keeping the loaded company profile - {path} could not be reloaded: {str(e)}")
+        return current
+
+def write_json_atomic(path, data, indent=2):
+    """Write JSON to a temporary file beside `path` and rename it into place, so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f.name, path)
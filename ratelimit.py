@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Client-side rate limiting for Gemini calls in the HR Candidate Scorer application.
+
+Every call passes through a token bucket sized to the project's quota, an
+AIMD concurrency limit that halves on 429s and creeps back up on success,
+and jittered exponential-backoff retries bounded by a deadline. The bucket
+(and any 429 cool-down) can live in a SQLite file so all worker processes
+on an instance share one budget.
+"""
+
+import os
+import time
+import random
+import sqlite3
+import threading
+
+THROTTLE_CODES = {429}
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+# google.api_core exception class names, for errors that don't carry an HTTP code
+THROTTLE_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+RETRYABLE_ERRORS = THROTTLE_ERRORS | {"ServiceUnavailable", "InternalServerError", "BadGateway", "GatewayTimeout", "DeadlineExceeded"}
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a call can't be admitted before its deadline"""
+
+def classify_error(error):
+    """Return "throttled", "retryable" or None for an exception raised by a Gemini call"""
+    code = getattr(error, 'code', None)
+    code = code if isinstance(code, int) else None
+    name = type(error).__name__
+    if code in THROTTLE_CODES or name in THROTTLE_ERRORS:
+        return "throttled"
+    if code in RETRYABLE_CODES or name in RETRYABLE_ERRORS:
+        return "retryable"
+    return None
+
+class TokenBucket:
+    """In-process token bucket refilled at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token, returning 0, or return the seconds to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def cooldown(self, seconds):
+        """Hold back every caller for `seconds` (after a 429)"""
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+class SharedTokenBucket:
+    """Token bucket stored in SQLite so every worker process on the host draws from one budget"""
+
+    def __init__(self, path, rate, capacity, name='gemini'):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, cooldown_until REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated_at, cooldown_until) VALUES (?, ?, ?, 0)",
+            (name, capacity, time.time())
+        )
+
+    def try_acquire(self):
+        """Take a token, returning 0, or return the seconds to wait before trying again"""
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front so processes can't both spend the last token
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated_at, cooldown_until = self._conn.execute(
+                    "SELECT tokens, updated_at, cooldown_until FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+                if now < cooldown_until:
+                    wait = cooldown_until - now
+                elif tokens >= 1:
+                    tokens -= 1
+                    wait = 0
+                else:
+                    wait = (1 - tokens) / self.rate
+                self._conn.execute(
+                    "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?", (tokens, now, self.name)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    def cooldown(self, seconds):
+        """Hold back every caller in every process for `seconds` (after a 429)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE buckets SET cooldown_until = MAX(cooldown_until, ?) WHERE name = ?",
+                (time.time() + seconds, self.name)
+            )
+
+class AIMDLimiter:
+    """Concurrency limit with additive increase on success and multiplicative decrease on throttling"""
+
+    def __init__(self, initial, minimum=1, maximum=64, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline):
+        """Wait for a free slot until the `deadline` (time.monotonic()); False if it passes"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled=False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            else:
+                # Roughly +1 per limit's worth of successful calls
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+class RateLimiter:
+    """Admits calls through a token bucket and AIMD concurrency limit, retrying transient failures"""
+
+    def __init__(self, bucket=None, concurrency=None, max_attempts=4, base_delay=1.0, max_delay=30.0, deadline=120.0):
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def _wait_for_token(self, deadline):
+        while self.bucket is not None:
+            wait = self.bucket.try_acquire()
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout("Gemini rate limit: no capacity before the deadline")
+            time.sleep(wait)
+
+    def call(self, fn, can_retry=None, on_retry=None):
+        """Run `fn()` under the limits, retrying throttled/transient errors with jittered backoff.
+
+        `can_retry()` is consulted before each retry (e.g. a stream that has
+        already emitted output must not be replayed); `on_retry(kind, error)`
+        is called before each retry.
+        """
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            self._wait_for_token(deadline)
+            if self.concurrency is not None and not self.concurrency.acquire(deadline):
+                raise RateLimitTimeout("Gemini rate limit: no free concurrency slot before the deadline")
+            throttled = False
+            try:
+                return fn()
+            except Exception as e:
+                kind = classify_error(e)
+                throttled = kind == "throttled"
+                # Full jitter: sleep anywhere up to the exponential backoff step
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                if kind is None or attempt >= self.max_attempts or (can_retry and not can_retry()) \
+                        or time.monotonic() + delay > deadline:
+                    raise
+                if throttled and self.bucket is not None:
+                    self.bucket.cooldown(delay)
+                if on_retry:
+                    on_retry(kind, e)
+            finally:
+                if self.concurrency is not None:
+                    self.concurrency.release(throttled)
+            time.sleep(delay)
@@ -1,21 +1,22 @@
 let currentStep = 0;
-let thinkingMessages = [
-    "Extracting candidate name and contact information...",
-    "Analyzing education background and certifications...",
-    "Parsing work experience and job progression...",
-    "Identifying technical skills and competencies...",
-    "Evaluating soft skills and leadership qualities...",
-    "Cross-referencing job requirements with candidate profile...",
-    "Loading company culture and values framework...",
-    "Assessing industry experience and domain knowledge...",
-    "Calculating skills match percentage...",
-    "Evaluating culture fit based on company profile...",
-    "Analyzing geographic and remote work preferences...",
-    "Determining growth stage compatibility...",
-    "Generating personalized interview questions...",
-    "Compiling strengths and potential concerns...",
-    "Finalizing recommendation and scoring..."
-];
+let partialScoring = {};
+
+// Pipeline stages reported by the server, mapped to progress step numbers
+const stageSteps = {
+    jd_fetched: 1,
+    text_extracted: 2,
+    resume_analyzed: 3,
+    scored: 4
+};
+
+const stageMessages = {
+    started: "Analysis started...",
+    jd_fetched: "Job description fetched",
+    text_extracted: "Resume text extracted",
+    resume_analyzed: "Candidate profile analyzed",
+    scoring_escalated: "Borderline first-pass score - re-scoring with the primary model",
+    scored: "Candidate scored against job and company profile"
+};
 
 document.getElementById('analyzeForm').onsubmit = async function(e) {
     e.preventDefault();
@@ -31,117 +32,189 @@ document.getElementById('analyzeForm').onsubmit = async function(e) {
     
     // Reset progress steps
     resetProgressSteps();
-    
-    // Start progress animation
-    startProgressAnimation();
-    
-    // Start thinking stream after 2 seconds
-    setTimeout(() => {
-        startThinkingStream();
-    }, 2000);
+    document.getElementById('thinkingStream').style.display = 'block';
     
     const formData = new FormData(this);
     
     try {
-        const response = await fetch('/analyze', {
+        const response = await fetch('/jobs', {
             method: 'POST',
             body: formData
         });
         
-        const data = await response.json();
+        const job = await response.json();
+        const data = job.job_id ? await waitForJob(job.job_id) : job;
         
-        // Complete all steps quickly
+        // Complete all steps
         completeAllSteps();
         
         // Show final thinking message
         addThinkingMessage("Analysis complete! Generating results...");
         
-        setTimeout(() => {
-            document.getElementById('loading').style.display = 'none';
-            document.getElementById('results').style.display = 'block';
-            
-            // Re-enable submit button
-            submitBtn.disabled = false;
-            submitBtn.textContent = 'Analyze Candidate';
-            
-            if (data.success) {
-                document.getElementById('resultContent').innerHTML = formatResults(data);
-            } else {
-                document.getElementById('resultContent').innerHTML = 
-                    `<div class="error">Error: ${data.error}</div>`;
-            }
-        }, 1000);
+        document.getElementById('loading').style.display = 'none';
+        document.getElementById('results').style.display = 'block';
+        
+        // Re-enable submit button
+        submitBtn.disabled = false;
+        submitBtn.textContent = 'Analyze Candidate';
+        
+        if (data.success) {
+            document.getElementById('resultContent').innerHTML = formatResults(data);
+        } else {
+            document.getElementById('resultContent').innerHTML = 
+                `<div class="error">Error: ${sanitizeHTML(data.error)}</div>`;
+        }
         
     } catch (error) {
         completeAllSteps();
         addThinkingMessage("Error occurred during analysis.");
         
-        setTimeout(() => {
-            document.getElementById('loading').style.display = 'none';
-            
-            // Re-enable submit button
-            submitBtn.disabled = false;
-            submitBtn.textContent = 'Analyze Candidate';
-            
-            document.getElementById('resultContent').innerHTML = 
-                `<div class="error">Error: ${error.message}</div>`;
-            document.getElementById('results').style.display = 'block';
-        }, 1000);
+        document.getElementById('loading').style.display = 'none';
+        
+        // Re-enable submit button
+        submitBtn.disabled = false;
+        submitBtn.textContent = 'Analyze Candidate';
+        
+        document.getElementById('resultContent').innerHTML = 
+            `<div class="error">Error: ${sanitizeHTML(error.message)}</div>`;
+        document.getElementById('results').style.display = 'block';
     }
 };
 
-function resetProgressSteps() {
-    currentStep = 0;
-    for (let i = 1; i <= 5; i++) {
-        const step = document.getElementById(`step${i}`);
-        step.className = 'step';
+function waitForJob(jobId) {
+    // Follow real progress events over SSE, falling back to polling if the stream fails
+    return new Promise((resolve, reject) => {
+        if (!window.EventSource) {
+            pollJob(jobId, 0).then(resolve, reject);
+            return;
+        }
+        
+        let received = 0;
+        const source = new EventSource(`/jobs/${jobId}/events`);
+        
+        source.addEventListener('progress', (event) => {
+            received++;
+            handleProgressEvent(JSON.parse(event.data));
+        });
+        
+        source.addEventListener('complete', (event) => {
+            source.close();
+            resolve(JSON.parse(event.data).result);
+        });
+        
+        source.onerror = () => {
+            source.close();
+            pollJob(jobId, received).then(resolve, reject);
+        };
+    });
+}
+
+async function pollJob(jobId, seenEvents) {
+    while (true) {
+        const response = await fetch(`/jobs/${jobId}`);
+        const job = await response.json();
+        if (job.error && !job.status) {
+            return job;
+        }
+        
+        job.events.slice(seenEvents).forEach(handleProgressEvent);
+        seenEvents = job.events.length;
+        
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job.result;
+        }
+        await new Promise(r => setTimeout(r, 1000));
+    }
+}
+
+function handleProgressEvent(event) {
+    // Streamed Gemini output: render completed scoring fields as they arrive
+    if (event.stage === 'resume_delta' || event.stage === 'scoring_delta') {
+        return;
+    }
+    if (event.stage === 'scoring_fields') {
+        Object.assign(partialScoring, event.fields);
+        renderPartialScoring();
+        return;
+    }
+    if (event.stage === 'scoring_escalated') {
+        // The primary model's fields replace the fast model's early scores
+        partialScoring = {};
+        renderPartialScoring();
     }
     
-    // Hide thinking stream
-    document.getElementById('thinkingStream').style.display = 'none';
-    document.getElementById('streamContent').innerHTML = '';
+    const message = stageMessages[event.stage] || event.stage;
+    const cached = event.cached ? ' (cached)' : '';
+    addThinkingMessage(`[${event.elapsed.toFixed(1)}s] ${message}${cached}`);
+    
+    if (event.stage === 'started') {
+        activateStep(1);
+    } else if (stageSteps[event.stage]) {
+        completeStep(stageSteps[event.stage]);
+    }
+}
+
+function activateStep(stepNumber) {
+    const step = document.getElementById(`step${stepNumber}`);
+    if (step.className !== 'step completed') {
+        step.className = 'step active';
+    }
+    currentStep = Math.max(currentStep, stepNumber);
 }
 
-function startProgressAnimation() {
-    const stepDuration = 3000; // 3 seconds per step
+function completeStep(stepNumber) {
+    document.getElementById(`step${stepNumber}`).className = 'step completed';
     
-    function activateNextStep() {
-        if (currentStep < 5) {
-            currentStep++;
-            
-            // Mark previous step as completed
-            if (currentStep > 1) {
-                document.getElementById(`step${currentStep - 1}`).className = 'step completed';
-            }
-            
-            // Mark current step as active
-            document.getElementById(`step${currentStep}`).className = 'step active';
-            
-            // Continue to next step
-            setTimeout(activateNextStep, stepDuration);
+    // Activate the first step that has not completed yet
+    for (let i = 1; i <= 5; i++) {
+        if (document.getElementById(`step${i}`).className !== 'step completed') {
+            activateStep(i);
+            break;
         }
     }
-    
-    // Start first step
-    setTimeout(activateNextStep, 500);
 }
 
-function startThinkingStream() {
-    document.getElementById('thinkingStream').style.display = 'block';
-    let messageIndex = 0;
+function renderPartialScoring() {
+    const container = document.getElementById('partialResults');
+    const scoreFields = [
+        ['Overall Score', 'overall_score', '🏆'],
+        ['Skills Match', 'skills_match', '🎯'],
+        ['Experience Match', 'experience_match', '💼'],
+        ['Culture Fit', 'culture_fit', '🤝']
+    ];
     
-    function addNextMessage() {
-        if (messageIndex < thinkingMessages.length) {
-            addThinkingMessage(thinkingMessages[messageIndex]);
-            messageIndex++;
-            
-            // Random delay between 1-3 seconds
-            const delay = Math.random() * 2000 + 1000;
-            setTimeout(addNextMessage, delay);
+    let html = `<div class="info-card score-breakdown"><h4 class="card-title">📊 Early Scores</h4><div class="scores-grid">`;
+    scoreFields.forEach(([label, key, icon]) => {
+        if (partialScoring[key] !== undefined) {
+            html += createScoreBar(label, sanitizeHTML(partialScoring[key]), icon);
         }
+    });
+    html += `</div>`;
+    if (partialScoring.recommendation) {
+        html += `<p><strong>${getRecommendationIcon(partialScoring.recommendation)} ${sanitizeHTML(partialScoring.recommendation)}</strong></p>`;
+    }
+    if (Array.isArray(partialScoring.strengths)) {
+        html += `<h5 class="section-title">✅ Strengths</h5><ul class="assessment-list">${partialScoring.strengths.map(item => `<li>${sanitizeHTML(item)}</li>`).join('')}</ul>`;
     }
+    html += `</div>`;
     
-    addNextMessage();
+    container.innerHTML = html;
+    container.style.display = 'block';
+}
+
+function resetProgressSteps() {
+    currentStep = 0;
+    partialScoring = {};
+    document.getElementById('partialResults').style.display = 'none';
+    document.getElementById('partialResults').innerHTML = '';
+    for (let i = 1; i <= 5; i++) {
+        const step = document.getElementById(`step${i}`);
+        step.className = 'step';
+    }
+    
+    // Hide thinking stream
+    document.getElementById('thinkingStream').style.display = 'none';
+    document.getElementById('streamContent').innerHTML = '';
 }
 
 function addThinkingMessage(message) {
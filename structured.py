@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Structured JSON output for the HR Candidate Scorer application.
+
+A prompt in prompts.json can declare a `response_schema` (the OpenAPI subset
+Gemini accepts). It is sent with the JSON response MIME type, so Gemini
+replies with bare JSON in that shape. The same schema is compiled into a
+pydantic model that validates and coerces the reply. A reply that still
+doesn't parse (prose around it, a markdown fence, trailing commas, output cut
+off mid-object) goes through a tolerant extractor and a repair pass, and the
+prompt is only re-generated if both fail.
+"""
+
+import os
+import re
+import json
+from functools import lru_cache
+from typing import Any, List, Optional, Union
+
+from pydantic import ConfigDict, ValidationError, create_model
+
+from metrics import STRUCTURED_OUTPUTS
+
+STRUCTURED_OUTPUT = os.environ.get('STRUCTURED_OUTPUT', 'true').lower() == 'true'
+STRUCTURED_OUTPUT_REGENERATIONS = int(os.environ.get('STRUCTURED_OUTPUT_REGENERATIONS', 1))
+
+# Whole numbers stay ints ("8" -> 8), fractional scores stay floats
+SCHEMA_TYPES = {"string": str, "integer": int, "number": Union[int, float], "boolean": bool}
+PYTHON_LITERALS = re.compile(r'\b(True|False|None)\b')
+
+class StructuredOutputError(ValueError):
+    """Raised when a reply can't be turned into a valid object of the prompt's schema"""
+
+def generation_config(schema=None, **kwargs):
+    """Gemini generation config asking for JSON in `schema`'s shape (None if there is nothing to set)"""
+    config = dict(kwargs)
+    if STRUCTURED_OUTPUT and schema:
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = schema
+    return config or None
+
+def _repair_segment(segment):
+    return PYTHON_LITERALS.sub(lambda match: {"True": "true", "False": "false", "None": "null"}[match.group(1)], segment)
+
+def repair_json(text):
+    """Best-effort fix of common LLM JSON mistakes outside string values.
+
+    Drops trailing commas, rewrites Python literals (True/False/None) and
+    closes strings, arrays and objects left open by a truncated reply.
+    """
+    out, closers, segment = [], [], []
+    in_string = escape = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            out.append(_repair_segment("".join(segment)))
+            segment = []
+            out.append(char)
+            in_string = True
+            continue
+        if char in '}]':
+            pending = _repair_segment("".join(segment)).rstrip()
+            segment = []
+            if pending.endswith(','):
+                pending = pending[:-1]
+            elif not pending and out and out[-1].rstrip().endswith(','):
+                out[-1] = out[-1].rstrip()[:-1]
+            out.append(pending)
+            if closers:
+                closers.pop()
+            out.append(char)
+            continue
+        if char in '{[':
+            closers.append('}' if char == '{' else ']')
+        segment.append(char)
+
+    if in_string:
+        if escape:
+            out[-1] = ""
+        out.append('"')
+    out.append(_repair_segment("".join(segment)))
+    repaired = "".join(out).rstrip()
+    if closers:
+        if repaired.endswith(','):
+            repaired = repaired[:-1]
+        elif repaired.endswith(':'):
+            repaired += ' null'
+    return repaired + "".join(reversed(closers))
+
+def extract_json(text):
+    """Parse the JSON object in an LLM reply.
+
+    Returns (data, outcome) where outcome is "parsed" (the reply was clean
+    JSON), "extracted" (an object was found amid prose or a markdown fence)
+    or "repaired". Raises StructuredOutputError if no object can be recovered.
+    """
+    text = (text or "").strip()
+    try:
+        data = json.loads(text, strict=False)
+        if isinstance(data, dict):
+            return data, "parsed"
+    except ValueError:
+        pass
+
+    decoder = json.JSONDecoder(strict=False)
+    starts = [match.start() for match in re.finditer(r'\{', text)]
+    for start in starts:
+        try:
+            data, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data, "extracted"
+
+    if starts:
+        try:
+            data, _ = decoder.raw_decode(repair_json(text[starts[0]:]))
+            if isinstance(data, dict):
+                return data, "repaired"
+        except ValueError:
+            pass
+    raise StructuredOutputError(f"No JSON object could be recovered from the response ({len(text)} characters)")
+
+def _annotation(schema, name):
+    kind = str(schema.get("type", "")).lower()
+    if kind == "object":
+        return _object_model(name, schema)
+    if kind == "array":
+        return List[_annotation(schema.get("items", {}), f"{name}Item")]
+    return SCHEMA_TYPES.get(kind, Any)
+
+def _object_model(name, schema):
+    required = set(schema.get("required", []))
+    fields = {}
+    for key, prop in schema.get("properties", {}).items():
+        annotation = _annotation(prop, f"{name}_{key}")
+        if key in required and not prop.get("nullable"):
+            fields[key] = (annotation, ...)
+        else:
+            fields[key] = (Optional[annotation], None)
+    # Extra keys are kept so a schema can list only the fields that matter
+    return create_model(name, __config__=ConfigDict(extra='allow', coerce_numbers_to_str=True), **fields)
+
+@lru_cache(maxsize=32)
+def _compiled_model(schema_json):
+    return _object_model("Response", json.loads(schema_json))
+
+def response_model(schema):
+    """Pydantic model for a response schema, compiled once per distinct schema"""
+    return _compiled_model(json.dumps(schema))
+
+def validate_response(schema, data):
+    """Validate and coerce `data` against `schema`, returning it as plain JSON-ready values"""
+    if not schema:
+        return data
+    try:
+        return response_model(schema).model_validate(data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        raise StructuredOutputError(f"Response does not match the schema: {e.error_count()} error(s), first: "
+                                    f"{'.'.join(map(str, e.errors()[0]['loc']))} {e.errors()[0]['msg']}")
+
+def parse_response(prompt_name, text, schema=None):
+    """Extract, repair if needed and validate a reply, counting the outcome per prompt"""
+    try:
+        data, outcome = extract_json(text)
+        data = validate_response(schema, data)
+    except StructuredOutputError:
+        STRUCTURED_OUTPUTS.inc(prompt=prompt_name, outcome="invalid")
+        raise
+    STRUCTURED_OUTPUTS.inc(prompt=prompt_name, outcome=outcome)
+    return data
+
+def generate_structured(prompt_name, generate, schema=None, regenerations=None):
+    """Call `generate(attempt)` for reply text and parse it, re-generating only if it can't be recovered.
+
+    `attempt` is 0 for the first call, so callers can skip streaming on
+    re-generations. Raises StructuredOutputError once the re-generations
+    (STRUCTURED_OUTPUT_REGENERATIONS by default) are used up.
+    """
+    regenerations = STRUCTURED_OUTPUT_REGENERATIONS if regenerations is None else regenerations
+    for attempt in range(regenerations + 1):
+        text = generate(attempt)
+        try:
+            return parse_response(prompt_name, text, schema)
+        except StructuredOutputError as e:
+            print(f"⚠️  Unusable {prompt_name} response: {str(e)}")
+            print(f"Raw response was: {text}")
+            if attempt >= regenerations:
+                raise
+            STRUCTURED_OUTPUTS.inc(prompt=prompt_name, outcome="regenerated")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Multi-tenant company profile registry for the HR Candidate Scorer application.
+
+Each client company ("tenant") has a profile `<tenant>.json` in a profiles
+directory, written by `analyze_company.py` with `COMPANY_TENANT` set. One
+service can then score for many companies: profiles are loaded on first use
+and kept compiled (compact JSON, rendered scoring prefix and per-model
+Gemini handles) in an LRU bounded by memory. An edited profile file is picked
+up on the next lookup.
+"""
+
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+TENANT_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+class UnknownTenant(KeyError):
+    """Raised for a tenant key that is malformed or has no profile in the registry"""
+
+class CompiledProfile:
+    """A tenant's profile with everything scoring needs precomputed"""
+
+    def __init__(self, tenant, profile, system_instruction, fingerprint):
+        self.tenant = tenant
+        self.profile = profile
+        self.system_instruction = system_instruction
+        self.fingerprint = fingerprint
+        # Scoring models with this tenant's prefix registered: model name -> (model, expires_at)
+        self.models = {}
+        self.lock = threading.Lock()
+        self.size = len(json.dumps(profile, separators=(',', ':'))) + len(system_instruction or "")
+
+class ProfileRegistry:
+    """Resolves tenant keys to compiled profiles, caching up to `max_bytes` of them in LRU order.
+
+    `compile_instruction(profile)` renders the static scoring prefix for a
+    profile; it runs once per profile load, not per request.
+    """
+
+    def __init__(self, directory, compile_instruction, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.compile_instruction = compile_instruction
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, tenant):
+        if not tenant or not TENANT_PATTERN.match(tenant):
+            raise UnknownTenant(tenant)
+        return os.path.join(self.directory, f"{tenant}.json")
+
+    def get(self, tenant):
+        """Compiled profile for `tenant`, loading (or reloading, if its file changed) as needed"""
+        path = self.path_for(tenant)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._discard(tenant)
+            raise UnknownTenant(tenant)
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(tenant)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(tenant)
+                self.hits += 1
+                return entry
+
+        # Load outside the lock so a slow read doesn't block other tenants
+        try:
+            with open(path, 'r') as f:
+                profile = json.load(f)
+        except (OSError, ValueError) as e:
+            if entry is not None:
+                print(f"⚠️  Keeping the loaded profile for tenant {tenant} - {path} could not be read: {str(e)}")
+                return entry
+            raise UnknownTenant(tenant)
+        compiled = CompiledProfile(tenant, profile, self.compile_instruction(profile), fingerprint)
+
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(tenant, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+            if compiled.size <= self.max_bytes:
+                self._entries[tenant] = compiled
+                self.current_bytes += compiled.size
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted.size
+                    self.evictions += 1
+        print(f"✅ Loaded company profile for tenant {tenant}")
+        return compiled
+
+    def _discard(self, tenant):
+        with self._lock:
+            entry = self._entries.pop(tenant, None)
+            if entry is not None:
+                self.current_bytes -= entry.size
+
+    def clear(self):
+        """Drop every compiled profile (e.g. after the scoring prompt changed)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes
+            }
@@ -23,12 +23,14 @@ def test_url_extraction():
     
     # Mock the network call
     with requests_mock.Mocker() as m:
-        m.get("https://httpbin.org/html", text="<html><body><h1>Herman Melville</h1></body></html>")
+        m.get("https://httpbin.org/html", text="<html><body><h1>Herman Melville</h1><p>Moby-Dick; or, The Whale. Call me Ishmael.</p></body></html>")
+        m.get("https://httpbin.org/empty", text='<html><body><div id="root"></div><script>render()</script></body></html>')
     
         # Test with a simple URL (using a test page)
         try:
             text = extract_text_from_url("https://httpbin.org/html")
-            if text and "Herman Melville" in text:
+            empty = extract_text_from_url("https://httpbin.org/empty")
+            if text and "Herman Melville" in text and empty.startswith("Error"):
                 print("✅ URL extraction working")
                 return True
             else:
@@ -38,6 +40,980 @@ def test_url_extraction():
             print(f"❌ URL extraction failed: {e}")
             return False
 
+def test_jd_revalidation():
+    """Test stale JD cache entries are revalidated with a conditional GET"""
+    print("Testing JD conditional revalidation...")
+    
+    from jd_fetcher import JDFetcher
+    
+    fetcher = JDFetcher(fresh_seconds=0)
+    with requests_mock.Mocker() as m:
+        m.get("https://jobs.example.com/posting", [
+            {"text": "<html><body>Data Engineer</body></html>", "headers": {"ETag": '"v1"'}},
+            {"status_code": 304}
+        ])
+        first = fetcher.fetch_text("https://jobs.example.com/posting")
+        second = fetcher.fetch_text("https://JOBS.example.com/posting#apply")
+        conditional = m.request_history[-1].headers.get('If-None-Match')
+    
+    if "Data Engineer" in first and second == first and conditional == '"v1"' and fetcher.revalidations == 1:
+        print("✅ JD revalidation working")
+        return True
+    else:
+        print(f"❌ JD revalidation unexpected: stats={fetcher.stats()}, If-None-Match={conditional}")
+        return False
+
+def test_jd_extraction():
+    """Test JD pages are reduced to the posting via JSON-LD or the main content block"""
+    print("Testing JD extraction...")
+    
+    import json
+    from jd_extraction import extract_job_text
+    
+    posting = {
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "Organization", "name": "Acme"},
+            {
+                "@type": "JobPosting",
+                "title": "Senior Python Engineer",
+                "hiringOrganization": {"@type": "Organization", "name": "Acme"},
+                "jobLocation": {"@type": "Place", "address": {"addressLocality": "Berlin", "addressCountry": "DE"}},
+                "description": "<p>Build <b>scoring</b> services.</p><ul><li>5+ years Python</li></ul>"
+            }
+        ]
+    }
+    json_ld_page = (
+        f'<html><head><script type="application/ld+json">{json.dumps(posting)}</script></head>'
+        '<body><nav>Home Jobs</nav><p>Unrelated page text</p></body></html>'
+    )
+    readability_page = """<html><body class="nav-open"><header>Logo</header>
+        <div class="cookie-banner">We use cookies to make things better, accept all.</div>
+        <div class="menu"><a href="/">Home</a><a href="/jobs">Jobs</a></div>
+        <div id="job-description"><h1>Data Engineer</h1>
+        <p>We are looking for a data engineer to build pipelines, models, and dashboards for our analytics team.</p>
+        <h2>Requirements</h2><ul><li>3+ years of <b>SQL</b>, Python, and Airflow experience in production</li>
+        <li>Experience with BigQuery, dbt, and streaming systems like Kafka</li></ul></div>
+        <div class="related-jobs"><p>Similar job: Analyst, Berlin, Germany, full time position here</p></div>
+        <footer>&copy; 2024 Acme. All rights reserved.</footer></body></html>"""
+    
+    # Layout wrappers whose class names merely contain boilerplate words must keep the posting
+    requirements = "<p>You will design data pipelines, mentor engineers, and own our analytics platform.</p>" * 3
+    wrapped_pages = [
+        f'<html><body><div class="page has-sidebar"><div>{requirements}</div></div></body></html>',
+        f'<html><body><div id="app" class="layout-with-header"><div>{requirements}</div></div></body></html>',
+        f'<html><body><div class="sidebar">{requirements}</div></body></html>'
+    ]
+    
+    json_ld_text, json_ld_method = extract_job_text(json_ld_page)
+    main_text, main_method = extract_job_text(readability_page)
+    wrapped_texts = [extract_job_text(page)[0] for page in wrapped_pages]
+    
+    if json_ld_method == "json-ld" and "Senior Python Engineer" in json_ld_text and "Location: Berlin, DE" in json_ld_text \
+            and "Build scoring services." in json_ld_text and "Unrelated" not in json_ld_text and \
+            main_method == "main-content" and "3+ years of SQL, Python" in main_text and \
+            not any(noise in main_text for noise in ("cookies", "Home", "Similar job", "rights reserved")) and \
+            all("mentor engineers" in text for text in wrapped_texts):
+        print("✅ JD extraction working")
+        return True
+    else:
+        print(f"❌ JD extraction unexpected: {json_ld_method}: {json_ld_text!r}, {main_method}: {main_text!r}, "
+              f"wrapped: {wrapped_texts!r}")
+        return False
+
+def test_company_crawl():
+    """Test company pages are crawled with sitemap discovery"""
+    print("Testing company crawl...")
+    
+    import re
+    from utils import extract_company_pages
+    
+    with requests_mock.Mocker() as m:
+        m.get(re.compile(r"https://company\.example\.com/.*"), status_code=404)
+        m.get("https://company.example.com/", text="<p>" + "Welcome " * 50 + "</p>")
+        m.get("https://company.example.com/careers", text="<p>" + "Join us " * 50 + "</p>")
+        m.get("https://company.example.com/sitemap.xml",
+              text="<urlset><url><loc>https://company.example.com/company/our-values</loc></url></urlset>")
+        m.get("https://company.example.com/company/our-values", text="<p>" + "Integrity " * 50 + "</p>")
+        pages = extract_company_pages("https://company.example.com/")
+    
+    if list(pages.keys()) == ['main', 'careers', 'our-values']:
+        print("✅ Company crawl working")
+        return True
+    else:
+        print(f"❌ Company crawl returned unexpected pages: {list(pages.keys())}")
+        return False
+
+def test_company_crawl_sitemap():
+    """Test sitemap pages replace guessed paths of the same type and blog posts are skipped"""
+    print("Testing company crawl sitemap...")
+    
+    import re
+    from utils import extract_company_pages
+    
+    posts = [f"https://company.example.com/blog/{year}/why-culture-{year}" for year in range(2018, 2025)]
+    posts += ["https://company.example.com/careers/senior-engineer-123", "https://company.example.com/blog/our-values-at-work"]
+    sitemap = "".join(f"<url><loc>{url}</loc></url>" for url in ["https://company.example.com/en/about"] + posts)
+    
+    with requests_mock.Mocker() as m:
+        m.get(re.compile(r"https://company\.example\.com/.*"), text="<p>" + "Filler " * 50 + "</p>")
+        m.get("https://company.example.com/", text="<p>" + "Welcome " * 50 + "</p>")
+        m.get("https://company.example.com/about", status_code=404)
+        m.get("https://company.example.com/en/about", text="<p>" + "Our story " * 50 + "</p>")
+        m.get("https://company.example.com/sitemap.xml", text=f"<urlset>{sitemap}</urlset>")
+        pages = extract_company_pages("https://company.example.com/")
+        requested = {request.url for request in m.request_history}
+    
+    if "Our story" in pages.get("about", "") and not any(post in requested for post in posts) and \
+            "https://company.example.com/about" not in requested:
+        print("✅ Company crawl sitemap working")
+        return True
+    else:
+        print(f"❌ Company crawl sitemap unexpected: pages={list(pages.keys())}, requested={sorted(requested)}")
+        return False
+
+def test_company_crawl_deadline():
+    """Test pages still downloading at the crawl deadline keep their session until they finish"""
+    print("Testing company crawl deadline...")
+    
+    import time
+    import threading
+    import utils
+    
+    events = []
+    finished = threading.Event()
+    parse_html = utils.parse_html
+    
+    # Delay parsing rather than the mocked response, since requests_mock serves responses one at a time
+    def slow_parse(content):
+        if b"Slow" in content:
+            time.sleep(0.5)
+            events.append("slow page finished")
+            finished.set()
+        return parse_html(content)
+    
+    close = requests.Session.close
+    
+    def record_close(session):
+        events.append("session closed")
+        close(session)
+    
+    with requests_mock.Mocker() as m, patch.object(utils, 'parse_html', slow_parse), \
+         patch.object(requests.Session, 'close', record_close):
+        m.get("https://company.example.com/", text="<p>" + "Welcome " * 50 + "</p>")
+        m.get("https://company.example.com/careers", text="<p>" + "Slow " * 50 + "</p>")
+        pages = utils.extract_company_pages("https://company.example.com/", pages=["/careers"], deadline=0.2)
+        returned_before_close = "session closed" not in events
+        finished.wait(2)
+        time.sleep(0.1)
+    
+    if list(pages.keys()) == ['main'] and returned_before_close and events == ["slow page finished", "session closed"]:
+        print("✅ Company crawl deadline working")
+        return True
+    else:
+        print(f"❌ Company crawl deadline unexpected: pages={list(pages.keys())}, events={events}")
+        return False
+
+def test_incremental_json():
+    """Test streamed scoring JSON yields fields as soon as they complete"""
+    print("Testing incremental JSON parsing...")
+    
+    from utils import IncrementalJSONParser
+    
+    parser = IncrementalJSONParser()
+    streamed = '```json\n{"overall_score": 8, "strengths": ["APIs, testing", "Mentoring"], "rationale": "Strong fit"}\n```'
+    seen = []
+    for i in range(0, len(streamed), 6):
+        seen.extend(parser.feed(streamed[i:i + 6]).keys())
+    
+    if seen == ["overall_score", "strengths", "rationale"] and parser.fields["strengths"][0] == "APIs, testing":
+        print("✅ Incremental JSON parsing working")
+        return True
+    else:
+        print(f"❌ Incremental JSON parsing returned {parser.fields}")
+        return False
+
+def test_stage_graph():
+    """Test independent pipeline stages overlap and record their wall time"""
+    print("Testing stage graph...")
+    
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from pipeline import StageGraph, StageError
+    
+    def slow(value):
+        time.sleep(0.2)
+        return value
+    
+    graph = StageGraph()
+    graph.add("jd", lambda: slow("jd"))
+    graph.add("analyze", lambda: slow("resume"))
+    graph.add("score", lambda jd, analyze: f"{jd}+{analyze}", deps=("jd", "analyze"))
+    
+    # A failing stage waits for running stages (which may hold the caller's upload) and flags the run cancelled
+    finished = []
+    
+    def dead_jd():
+        raise StageError("Error: dead JD URL")
+    
+    def extract():
+        time.sleep(0.2)
+        finished.append("extract")
+        return "text"
+    
+    failing = StageGraph()
+    failing.add("jd", dead_jd)
+    failing.add("extract", extract)
+    failing.add("analyze", lambda extract: finished.append("analyze"), deps=("extract",))
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results, timings = graph.run(executor)
+        elapsed = time.perf_counter() - started
+        try:
+            failing.run(executor)
+            failed_stage = None
+        except StageError as e:
+            failed_stage = e.stage
+        finished_at_raise = list(finished)
+    
+    if results["score"] == "jd+resume" and elapsed < 0.35 and timings["jd"] >= 0.2 and \
+            failed_stage == "jd" and finished_at_raise == ["extract"] and failing.cancelled.is_set():
+        print(f"✅ Stage graph working ({elapsed:.2f}s)")
+        return True
+    else:
+        print(f"❌ Stage graph took {elapsed:.2f}s, results: {results}, failed {failed_stage} after {finished_at_raise}")
+        return False
+
+def test_stage_cancellation():
+    """Test a dead JD URL neither leaves stages running nor spends a Gemini call on the resume"""
+    print("Testing stage cancellation...")
+    
+    import json
+    import threading
+    import uuid
+    import main
+    
+    analysis = Mock(return_value=json.dumps({"name": "Unused"}))
+    cancelled = threading.Event()
+    cancelled.set()
+    
+    with requests_mock.Mocker() as m, patch.object(main, 'analyze_resume', analysis):
+        m.get("https://example.com/dead-job", status_code=404)
+        result = main.process_candidate("resume.txt", f"Candidate {uuid.uuid4()}".encode('utf-8'),
+                                        jd_url="https://example.com/dead-job")
+        try:
+            main._analyze_resume_stage(f"Candidate {uuid.uuid4()}", uuid.uuid4().hex, main._no_progress, False, cancelled)
+            skipped = False
+        except main.StageError:
+            skipped = True
+    
+    if "error" in result and skipped and analysis.call_count <= 1:
+        print("✅ Stage cancellation working")
+        return True
+    else:
+        print(f"❌ Stage cancellation unexpected: result={result}, skipped={skipped}, analysis calls={analysis.call_count}")
+        return False
+
+def test_hedged_pdf_extraction():
+    """Test hedged extraction returns good local text without waiting for Document AI"""
+    print("Testing hedged PDF extraction...")
+    
+    import time
+    import pdf_extraction
+    
+    def slow_document_ai(*args):
+        time.sleep(1)
+        return "Document AI text"
+    
+    local_text = "Experienced engineer " * 20
+    with patch.object(pdf_extraction, 'extract_with_documentai', side_effect=slow_document_ai), \
+         patch.object(pdf_extraction, 'extract_with_pypdf2', return_value=(local_text, 1)):
+        started = time.perf_counter()
+        text = pdf_extraction.extract_hedged(b"%PDF", "project", "us", "processor")
+        elapsed = time.perf_counter() - started
+    
+    # Document AI answering first with no text must not hide the (slower, short) local text
+    def slow_local(*args):
+        time.sleep(0.2)
+        return "Scanned page", 1
+    
+    with patch.object(pdf_extraction, 'extract_with_documentai', return_value=""), \
+         patch.object(pdf_extraction, 'extract_with_pypdf2', side_effect=slow_local):
+        empty_docai_text = pdf_extraction.extract_hedged(b"%PDF", "project", "us", "processor")
+    
+    if text == local_text and elapsed < 0.5 and empty_docai_text == "Scanned page":
+        print("✅ Hedged PDF extraction working")
+        return True
+    else:
+        print(f"❌ Hedged PDF extraction returned after {elapsed:.2f}s: {text[:50]}, empty Document AI: {empty_docai_text!r}")
+        return False
+
+def test_batch_analysis():
+    """Test batch scoring streams per-candidate results and a ranked summary"""
+    print("Testing batch analysis...")
+    
+    import io
+    import json
+    import main
+    
+    scores = {"Alice": 6, "Bob": 9}
+    
+    def fake_score(resume_data, jd_text, company_profile=None, **kwargs):
+        name = json.loads(resume_data)["name"]
+        return json.dumps({"overall_score": scores[name], "recommendation": "Moderate Match"})
+    
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'analyze_resume', side_effect=lambda text: json.dumps({"name": text.strip()})), \
+         patch.object(main, 'score_candidate_with_company_context', side_effect=fake_score):
+        m.get("https://example.com/job", text="<html><body>Senior Engineer building Python services and data pipelines</body></html>")
+        
+        with main.app.test_client() as client:
+            response = client.post('/analyze/batch', data={
+                'jd_url': 'https://example.com/job',
+                'resume_files': [
+                    (io.BytesIO(b"Alice"), 'alice.txt'),
+                    (io.BytesIO(b"Bob"), 'bob.txt')
+                ]
+            }, content_type='multipart/form-data')
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    
+    candidates = [line for line in lines if line["type"] == "candidate"]
+    summary = lines[-1]
+    ranking = [entry["name"] for entry in summary.get("ranking", [])]
+    if len(candidates) == 2 and summary["type"] == "summary" and ranking == ["Bob", "Alice"]:
+        print("✅ Batch analysis working")
+        return True
+    else:
+        print(f"❌ Batch analysis returned unexpected output: {lines}")
+        return False
+
+def test_batch_disconnect():
+    """Test a client disconnect cancels queued batch candidates and waits for running ones"""
+    print("Testing batch disconnect...")
+    
+    import io
+    import json
+    import time
+    import uuid
+    import main
+    from concurrent.futures import ThreadPoolExecutor
+    
+    scored = []
+    
+    def slow_score(resume_data, jd_text, company_profile=None, **kwargs):
+        if scored:
+            time.sleep(0.3)
+        scored.append(json.loads(resume_data)["name"])
+        return json.dumps({"overall_score": 7})
+    
+    run = uuid.uuid4().hex
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'batch_executor', ThreadPoolExecutor(max_workers=1)), \
+         patch.object(main, 'analyze_resume', side_effect=lambda text: json.dumps({"name": text.split()[0]})), \
+         patch.object(main, 'score_candidate_with_company_context', side_effect=slow_score):
+        m.get("https://example.com/job", text="<html><body>Senior Engineer building Python services and data pipelines</body></html>")
+        
+        with main.app.test_client() as client:
+            response = client.post('/analyze/batch', data={
+                'jd_url': 'https://example.com/job',
+                'resume_files': [(io.BytesIO(f"{name} {run}".encode('utf-8')), f"{name}.txt") for name in ("Ann", "Ben", "Cy")]
+            }, content_type='multipart/form-data', buffered=False)
+            first = json.loads(next(iter(response.response)))
+            response.close()
+            scored_at_close = list(scored)
+    
+    # Ann was streamed, Ben was running and must have finished, Cy was queued and must never be scored
+    if first.get("filename") == "Ann.txt" and scored_at_close == ["Ann", "Ben"] and scored == ["Ann", "Ben"]:
+        print("✅ Batch disconnect working")
+        return True
+    else:
+        print(f"❌ Batch disconnect unexpected: first={first}, scored at close={scored_at_close}, scored={scored}")
+        return False
+
+def test_batch_prescreen():
+    """Test pre-screening only sends the best lexical matches to LLM scoring"""
+    print("Testing batch pre-screening...")
+    
+    import io
+    import json
+    import uuid
+    import main
+    
+    run = uuid.uuid4().hex
+    resumes = {
+        "backend.txt": f"{run} Backend engineer. Python, Django, PostgreSQL and REST APIs for payments.",
+        "platform.txt": f"{run} Platform engineer running Python services on Kubernetes and PostgreSQL.",
+        "chef.txt": f"{run} Pastry chef specialising in laminated doughs, chocolate and plated desserts."
+    }
+    score = Mock(return_value=json.dumps({"overall_score": 7}))
+    
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'analyze_resume', side_effect=lambda text: json.dumps({"name": text.split()[2], "skills": []})), \
+         patch.object(main, 'score_candidate_with_company_context', score):
+        m.get("https://example.com/python-job", text="<html><body>Senior Python engineer: Django, PostgreSQL, REST APIs and Celery</body></html>")
+        
+        with main.app.test_client() as client:
+            response = client.post('/analyze/batch', data={
+                'jd_url': 'https://example.com/python-job',
+                'top_k': '2',
+                'resume_files': [(io.BytesIO(text.encode('utf-8')), name) for name, text in resumes.items()]
+            }, content_type='multipart/form-data')
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    
+    screened = [line["filename"] for line in lines if line.get("result", {}).get("screened_out")]
+    summary = lines[-1]
+    if screened == ["chef.txt"] and score.call_count == 2 and summary.get("screened_out") == 1 and summary.get("succeeded") == 2:
+        print("✅ Batch pre-screening working")
+        return True
+    else:
+        print(f"❌ Pre-screening returned unexpected output ({score.call_count} scoring calls): {lines}")
+        return False
+
+def test_scoring_cascade():
+    """Test only borderline first-pass scores are escalated to the primary model"""
+    print("Testing scoring cascade...")
+    
+    import json
+    import uuid
+    import main
+    
+    first_pass = {"Borderline": 6, "Clear": 9}
+    calls = []
+    
+    def fake_score(resume_data, jd_text, company_profile=None, on_chunk=None, model_name=None, tenant_profile=None):
+        name = json.loads(resume_data)["name"]
+        calls.append((name, model_name))
+        score = first_pass[name] if model_name == main.GEMINI_FAST_MODEL else 8
+        return json.dumps({"overall_score": score})
+    
+    with patch.object(main, 'SCORING_CASCADE', True), \
+         patch.object(main, 'analyze_resume', side_effect=lambda text: json.dumps({"name": text.split()[0]})), \
+         patch.object(main, 'score_candidate_with_company_context', side_effect=fake_score):
+        results = {
+            name: main.process_candidate(f"{name.lower()}.txt", f"{name} {uuid.uuid4()}".encode('utf-8'), jd_text="Engineer")
+            for name in first_pass
+        }
+    
+    borderline, clear = results["Borderline"], results["Clear"]
+    if borderline.get("model_tier", {}).get("tier") == "escalated" and borderline["scoring"]["overall_score"] == 8 and \
+            borderline["model_tier"]["first_pass_score"] == 6 and clear.get("model_tier", {}).get("tier") == "fast" and \
+            calls.count(("Clear", main.GEMINI_FAST_MODEL)) == 1 and len(calls) == 3:
+        print("✅ Scoring cascade working")
+        return True
+    else:
+        print(f"❌ Cascade returned unexpected results: {results}, calls: {calls}")
+        return False
+
+def test_prompt_budget():
+    """Test long inputs are packed into the token budget, keeping relevant sections over boilerplate"""
+    print("Testing prompt token budget...")
+    
+    import prompts
+    from budget import fit_to_budget, estimate_tokens
+    from metrics import REGISTRY
+    
+    jd_text = "\n".join([
+        "Home\nJobs\nCompanies\nSalaries\nSign in",
+        "We use cookies to improve your experience. " * 40,
+        "Requirements:\n" + "5+ years of Python and distributed systems experience. " * 20,
+        "Company history: founded long ago in a garage by two friends. " * 60,
+        "Responsibilities:\n" + "Design and operate scoring services on Cloud Run. " * 20,
+        "© 2024 Example Corp. All rights reserved. Privacy Policy. Terms of Use."
+    ])
+    fitted, stats = fit_to_budget(jd_text, 600, kind="jd")
+    short, short_stats = fit_to_budget("Requirements: Python", 600, kind="jd")
+    
+    with patch.object(prompts, 'PROMPT_TOKEN_BUDGETS', {"score_candidate.jd_text": 600}):
+        prompt = prompts.get_prompt("score_candidate", resume_data="{}", jd_text=jd_text)
+    trimmed_metric = 'hr_scorer_prompt_budget_trims_total{prompt="score_candidate",field="jd_text"}'
+    
+    if estimate_tokens(fitted) <= 600 and "Requirements:" in fitted and "Responsibilities:" in fitted and \
+            "cookies" not in fitted and "All rights reserved" not in fitted and "[...]" in fitted and \
+            stats["tokens_in"] > stats["tokens_out"] and short == "Requirements: Python" and \
+            short_stats["lines_dropped"] == 0 and fitted in prompt and trimmed_metric in REGISTRY.render():
+        print(f"✅ Prompt budget working ({stats['tokens_in']} -> {stats['tokens_out']} tokens)")
+        return True
+    else:
+        print(f"❌ Unexpected fitted text ({stats}): {fitted[:300]!r}")
+        return False
+
+def test_scoring_context_cache():
+    """Test the scoring prefix is registered with context caching, falls back to a system instruction, and stays out of the prompt"""
+    print("Testing scoring context cache...")
+    
+    import json
+    import main
+    
+    profile = {"company_focus": {"core_mission": "Precompiled mission"}}
+    instruction = main.render_scoring_instruction(profile)
+    
+    def score_with(create):
+        genai = Mock()
+        genai.caching.CachedContent.create.side_effect = create
+        generate = Mock(return_value=json.dumps({"overall_score": 7}))
+        with patch.object(main, 'get_genai', return_value=genai), \
+             patch.object(main, '_generate_text', generate), \
+             patch.object(main, 'GEMINI_CONTEXT_CACHE', True), \
+             patch.object(main, 'COMPANY_PROFILE', profile), \
+             patch.object(main, 'SCORING_SYSTEM_INSTRUCTION', instruction), \
+             patch.object(main, '_scoring_models', {}):
+            for _ in range(2):
+                main.score_candidate_with_company_context('{"name": "Jane"}', "Data Engineer JD", profile)
+        return genai, generate
+    
+    cached_genai, cached_generate = score_with(lambda **kwargs: Mock(name="cached-content"))
+    fallback_genai, fallback_generate = score_with(RuntimeError("model does not support caching"))
+    
+    _, prompt, _, cached_model = cached_generate.call_args.args
+    _, _, _, fallback_model = fallback_generate.call_args.args
+    create = cached_genai.caching.CachedContent.create
+    if create.call_count == 1 and create.call_args.kwargs["system_instruction"] == instruction and \
+            cached_model is cached_genai.GenerativeModel.from_cached_content.return_value and \
+            fallback_model is fallback_genai.GenerativeModel.return_value and \
+            fallback_genai.GenerativeModel.call_args.kwargs["system_instruction"] == instruction and \
+            fallback_genai.GenerativeModel.call_count == 1 and \
+            '"name": "Jane"' in prompt and "Data Engineer JD" in prompt and "Precompiled mission" not in prompt:
+        print("✅ Scoring context cache working")
+        return True
+    else:
+        print(f"❌ Scoring context cache unexpected: create calls {create.call_args_list}, prompt {prompt!r}")
+        return False
+
+def test_gemini_rate_limiter():
+    """Test 429s are retried with backoff, shrink the concurrency limit and share one bucket across instances"""
+    print("Testing Gemini rate limiter...")
+    
+    import utils
+    from types import SimpleNamespace
+    from ratelimit import RateLimiter, AIMDLimiter, SharedTokenBucket
+    
+    class Throttled(Exception):
+        code = 429
+    
+    attempts = []
+    
+    def generate_content(prompt, generation_config=None):
+        attempts.append(prompt)
+        if len(attempts) <= 2:
+            raise Throttled("quota exceeded")
+        return SimpleNamespace(text="ok", usage_metadata=None)
+    
+    concurrency = AIMDLimiter(8, maximum=8)
+    limiter = RateLimiter(concurrency=concurrency, base_delay=0.01)
+    with patch.object(utils, 'gemini_limiter', limiter):
+        text = utils.generate_text(Mock(generate_content=generate_content), "test_prompt", "hello")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ratelimit.db')
+        first = SharedTokenBucket(path, rate=0.001, capacity=2)
+        second = SharedTokenBucket(path, rate=0.001, capacity=2)
+        waits = [first.try_acquire(), second.try_acquire(), first.try_acquire()]
+    
+    if text == "ok" and len(attempts) == 3 and concurrency.limit < 8 and concurrency.in_flight == 0 and \
+            waits[:2] == [0, 0] and waits[2] > 0:
+        print("✅ Gemini rate limiter working")
+        return True
+    else:
+        print(f"❌ Limiter returned {text!r} after {len(attempts)} attempts, limit {concurrency.limit}, waits {waits}")
+        return False
+
+def test_company_page_budget():
+    """Test crawled company pages are budgeted by paragraph, keeping careers pages with an EEO statement"""
+    print("Testing company page budget...")
+    
+    from budget import fit_to_budget
+    from utils import extract_company_pages, combine_company_pages
+    
+    def page(title, paragraphs):
+        body = "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+        return (f"<html><body><header><a href='/'>Home</a></header><h1>{title}</h1>{body}"
+                "<div class='legal'>© 2024 Acme. Privacy Policy. Sign in</div></body></html>")
+    
+    about = page("About Acme", [
+        "Acme builds hiring software used by thousands of recruiting teams across Europe and North America.",
+        "Our mission is to make every hiring decision fair, fast and grounded in evidence rather than gut feeling.",
+        "We value ownership, candour and craft, and we ship small improvements every single day."
+    ] * 3)
+    careers = page("Careers", [
+        "We hire engineers, designers and recruiters who care about candidates as much as customers.",
+        "Teams work remotely across three time zones and meet in person twice a year in Berlin.",
+        "Everyone gets a learning budget, mentoring from senior staff and time to work on internal tools.",
+        "Acme is an equal opportunity employer and we are happy to provide reasonable accommodation during "
+        "interviews. We welcome applicants of every background, and we review each application carefully."
+    ] * 2)
+    news = page("News", ["Acme was featured in a trade magazine roundup of promising software companies this spring."] * 6)
+    
+    with requests_mock.Mocker() as m:
+        m.get("https://company.example.com/", text=about)
+        m.get("https://company.example.com/careers", text=careers)
+        m.get("https://company.example.com/news", text=news)
+        pages = extract_company_pages("https://company.example.com/", pages=["/careers", "/news"])
+    
+    content = combine_company_pages(pages)
+    fitted, stats = fit_to_budget(content, 450, kind="company")
+    
+    if "Our mission is to make every hiring decision fair" in fitted and "equal opportunity employer" in fitted and \
+            "Teams work remotely" in fitted and "Privacy Policy" not in fitted and \
+            stats["tokens_in"] > 450 and stats["tokens_out"] > 380:
+        print(f"✅ Company page budget working ({stats['tokens_in']} -> {stats['tokens_out']} tokens)")
+        return True
+    else:
+        print(f"❌ Company page budget unexpected ({stats}): {fitted!r}")
+        return False
+
+def test_config_reload():
+    """Test prompts.json and company_profile.json are hot-reloaded, keeping the loaded copy on a bad file"""
+    print("Testing config hot reload...")
+    
+    import json
+    import main
+    import prompts
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        prompts_path = os.path.join(tmp, 'prompts.json')
+        profile_path = os.path.join(tmp, 'company_profile.json')
+        prompts.write_json_atomic(prompts_path, prompts.get_prompts())
+        prompts.write_json_atomic(profile_path, {"company_focus": {"core_mission": "Reloaded mission"}})
+        
+        with patch.object(main, 'PROMPTS_PATH', prompts_path), \
+             patch.object(main, 'COMPANY_PROFILE_PATH', profile_path), \
+             patch.object(main, 'COMPANY_PROFILE', None), \
+             patch.object(main, 'SCORING_SYSTEM_INSTRUCTION', None), \
+             patch.object(main, '_loaded_config_fingerprint', None), \
+             patch.object(prompts, '_prompts', prompts.get_prompts()):
+            reloaded = main.reload_config()
+            profile = main.COMPANY_PROFILE
+            instruction = main.SCORING_SYSTEM_INSTRUCTION or ""
+            unchanged = main.reload_config()
+            with open(profile_path, 'w') as f:
+                f.write('{"company_focus": ')  # Half-written file
+            main.reload_config()
+            kept = main.COMPANY_PROFILE
+    
+    if reloaded and not unchanged and profile.get("company_focus", {}).get("core_mission") == "Reloaded mission" and \
+            "Reloaded mission" in instruction and kept is profile:
+        print("✅ Config hot reload working")
+        return True
+    else:
+        print(f"❌ Reload returned {reloaded}/{unchanged}, profile {profile}, kept {kept}")
+        return False
+
+def test_incremental_company_profile():
+    """Test the company analysis skips Gemini when no company page has changed"""
+    print("Testing incremental company profile...")
+    
+    import analyze_company
+    
+    pages = {"main": "Welcome " * 50, "careers": "Join us " * 50}
+    env = {"GCP_PROJECT_ID": "test", "GEMINI_API_KEY": "test", "COMPANY_WEBSITE": "https://company.example.com"}
+    cwd = os.getcwd()
+    exits = []
+    with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, env), \
+         patch.object(analyze_company, 'extract_company_pages', side_effect=lambda website: dict(pages)), \
+         patch.object(analyze_company, 'analyze_company_pages', return_value={"company_focus": {}}) as analyze:
+        os.chdir(tmp)
+        try:
+            for change in (None, None, "We're hiring " * 50):
+                if change:
+                    pages["careers"] = change
+                try:
+                    analyze_company.main()
+                    exits.append(None)
+                except SystemExit as e:
+                    exits.append(e.code)
+            manifest_written = os.path.exists(analyze_company.profile_paths()[1])
+        finally:
+            os.chdir(cwd)
+    
+    if analyze.call_count == 2 and exits == [None, 0, None] and manifest_written:
+        print("✅ Incremental company profile working")
+        return True
+    else:
+        print(f"❌ Gemini analysis ran {analyze.call_count} times, exits {exits}")
+        return False
+
+def test_tenant_profiles():
+    """Test /analyze resolves a tenant's compiled profile from the registry, with LRU eviction by size"""
+    print("Testing tenant profile registry...")
+    
+    import io
+    import json
+    import main
+    from tenants import ProfileRegistry, UnknownTenant
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for tenant, mission in (("acme", "Rockets for everyone"), ("globex", "Global exports")):
+            with open(os.path.join(tmp, f"{tenant}.json"), 'w') as f:
+                json.dump({"company_focus": {"core_mission": mission}}, f)
+        
+        registry = ProfileRegistry(tmp, main.render_scoring_instruction)
+        process = Mock(return_value={"success": True})
+        with patch.object(main, 'profile_registry', registry), patch.object(main, 'process_candidate', process):
+            with main.app.test_client() as client:
+                def post(**extra):
+                    return client.post('/analyze', data={
+                        'jd_url': 'https://example.com/job', 'resume_file': (io.BytesIO(b"resume"), 'cv.txt'), **extra
+                    }, content_type='multipart/form-data')
+                ok = post(tenant='ACME')
+                unknown = post(tenant='initech')
+                traversal = post(tenant='../acme')
+        tenant_profile = process.call_args.kwargs.get("tenant_profile")
+        
+        small = ProfileRegistry(tmp, main.render_scoring_instruction, max_bytes=tenant_profile.size + 10)
+        first = small.get("acme")
+        small.get("globex")
+        reloaded = small.get("acme")
+        try:
+            small.get("Bad/Key")
+            rejected = False
+        except UnknownTenant:
+            rejected = True
+    
+    if ok.status_code == 200 and unknown.status_code == 404 and traversal.status_code == 404 and \
+            process.call_count == 1 and tenant_profile.profile["company_focus"]["core_mission"] == "Rockets for everyone" and \
+            "Rockets for everyone" in (tenant_profile.system_instruction or "") and \
+            small.stats()["evictions"] == 2 and reloaded is not first and rejected:
+        print("✅ Tenant profile registry working")
+        return True
+    else:
+        print(f"❌ Tenant lookups returned {ok.status_code}/{unknown.status_code}/{traversal.status_code}, stats {small.stats()}")
+        return False
+
+def test_structured_output():
+    """Test malformed Gemini JSON is repaired and validated before any re-generation"""
+    print("Testing structured output...")
+
+    import json
+    import uuid
+    import main
+    from prompts import get_response_schema
+    from structured import StructuredOutputError, extract_json, generate_structured
+
+    schema = get_response_schema("score_candidate")
+    replies = iter(["Sorry, I can't score that.", '{"overall_score": "7", "strengths": ["APIs"]}'])
+    regenerate = Mock(side_effect=lambda attempt: next(replies))
+    regenerated = generate_structured("score_candidate", regenerate, schema)
+
+    repairs = {
+        '```json\n{"overall_score": 8}\n```': "extracted",
+        'Here you go: {"overall_score": 8, "concerns": [],} Thanks!': "repaired",
+        '{"overall_score": 8, "rationale": "Strong fit, cut off mid-sent': "repaired",
+    }
+    outcomes = {text: extract_json(text)[1] for text in repairs}
+    try:
+        generate_structured("score_candidate", lambda attempt: '{"strengths": ["APIs"]}', schema, regenerations=0)
+        rejected = False
+    except StructuredOutputError:
+        rejected = True
+
+    analysis = Mock(return_value='```json\n{"name": "Repaired Candidate", "skills": ["Python",],}\n```')
+    with patch.object(main, 'analyze_resume', analysis), \
+         patch.object(main, 'score_candidate_with_company_context', return_value='{"overall_score": 9}'):
+        result = main.process_candidate("repaired.txt", f"Candidate {uuid.uuid4()}".encode('utf-8'), jd_text="Engineer")
+
+    if regenerate.call_count == 2 and regenerated["overall_score"] == 7 and outcomes == repairs and rejected and \
+            analysis.call_count == 1 and result.get("resume_analysis", {}).get("skills") == ["Python"] and \
+            json.dumps(result["scoring"]) == '{"overall_score": 9}':
+        print("✅ Structured output working")
+        return True
+    else:
+        print(f"❌ Structured output unexpected: {regenerated}, {outcomes}, {result}")
+        return False
+
+def test_upload_limits():
+    """Test uploads spill to disk past the spool threshold and oversized uploads are rejected"""
+    print("Testing upload limits...")
+
+    import io
+    import os
+    import hashlib
+    import PyPDF2
+    import main
+    from uploads import MemoryBudget, UploadTooLarge, spool_upload
+    from pdf_extraction import extract_with_pypdf2
+
+    writer = PyPDF2.PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(200, 200)
+    pdf = io.BytesIO()
+    writer.write(pdf)
+    pdf = pdf.getvalue()
+
+    budget = MemoryBudget(len(pdf) + 10)
+    small = spool_upload("small.pdf", io.BytesIO(pdf), 1024 * 1024, len(pdf), budget)
+    full = spool_upload("full.pdf", io.BytesIO(pdf), 1024 * 1024, len(pdf), budget)
+    large = spool_upload("large.pdf", io.BytesIO(pdf), 1024 * 1024, 100)
+    path = large.path
+    _, page_count = extract_with_pypdf2(large.pdf_source, parallel_min_pages=100)
+    same_content = large.read() == pdf and large.content_hash == hashlib.sha256(pdf).hexdigest()
+    held = budget.in_use
+    for upload in (small, full, large):
+        upload.close()
+
+    try:
+        spool_upload("huge.pdf", io.BytesIO(b"x" * 2048), 1024, 100)
+        rejected = False
+    except UploadTooLarge:
+        rejected = True
+
+    with main.app.test_client() as client:
+        original_limit = main.app.config['MAX_CONTENT_LENGTH']
+        main.app.config['MAX_CONTENT_LENGTH'] = 1024
+        try:
+            too_large = client.post('/analyze', data={
+                'jd_url': 'https://example.com/job', 'resume_file': (io.BytesIO(b"x" * 4096), 'cv.txt')
+            }, content_type='multipart/form-data')
+        finally:
+            main.app.config['MAX_CONTENT_LENGTH'] = original_limit
+
+    if small.storage == "memory" and full.storage == "disk" and large.storage == "disk" and page_count == 3 and \
+            same_content and held == len(pdf) and budget.in_use == 0 and not os.path.exists(path) and rejected and \
+            too_large.status_code == 413 and "error" in too_large.get_json():
+        print("✅ Upload spooling and limits working")
+        return True
+    else:
+        print(f"❌ Upload storage {small.storage}/{full.storage}/{large.storage}, pages {page_count}, "
+              f"budget {held}/{budget.in_use}, oversized request {too_large.status_code}")
+        return False
+
+def test_resume_cache():
+    """Test repeat uploads of the same resume skip the analysis call"""
+    print("Testing resume cache...")
+    
+    import io
+    import json
+    import uuid
+    import main
+    import prompts
+    
+    resume = f"Candidate {uuid.uuid4()}".encode('utf-8')
+    analysis = Mock(return_value=json.dumps({"name": "Cached Candidate"}))
+    
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'analyze_resume', analysis), \
+         patch.object(main, 'score_candidate_with_company_context', return_value=json.dumps({"overall_score": 7})):
+        m.get("https://example.com/job", text="<html><body>Senior Engineer building Python services and data pipelines</body></html>")
+        
+        def upload():
+            client.post('/analyze', data={
+                'jd_url': 'https://example.com/job',
+                'resume_file': (io.BytesIO(resume), 'resume.txt')
+            }, content_type='multipart/form-data')
+        
+        with main.app.test_client() as client:
+            upload()
+            upload()
+            stats = client.get('/cache/stats').get_json()
+            cached_calls = analysis.call_count
+            # A different token budget trims the resume differently, so the cached analysis must not be reused
+            with patch.object(prompts, 'PROMPT_TOKEN_BUDGETS', {"analyze_resume.resume_text": 500}):
+                upload()
+    
+    if cached_calls == 1 and analysis.call_count == 2 and stats["resume"]["memory_hits"] >= 1:
+        print("✅ Resume cache working")
+        return True
+    else:
+        print(f"❌ Resume analysis called {analysis.call_count} times, stats: {stats}")
+        return False
+
+def test_scoring_cache():
+    """Test scoring results are memoized until they expire or the prompts or company profile change"""
+    print("Testing scoring cache...")
+    
+    import io
+    import json
+    import uuid
+    import cache
+    import main
+    import prompts
+    
+    clock = [1000.0]
+    resume = f"Candidate {uuid.uuid4()}".encode('utf-8')
+    score = Mock(return_value=json.dumps({"overall_score": 7}))
+    statuses = []
+    
+    def analyze(client):
+        response = client.post('/analyze', data={
+            'jd_url': 'https://example.com/job',
+            'resume_file': (io.BytesIO(resume), 'resume.txt')
+        }, content_type='multipart/form-data')
+        statuses.append((response.get_json().get("cache"), response.headers.get('X-Cache')))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        prompts_path = os.path.join(tmp, 'prompts.json')
+        profile_path = os.path.join(tmp, 'company_profile.json')
+        prompts.write_json_atomic(prompts_path, prompts.get_prompts())
+        prompts.write_json_atomic(profile_path, {"company_focus": {"core_mission": "Cached mission"}})
+        
+        with requests_mock.Mocker() as m, \
+             patch.object(cache, 'time', Mock(time=lambda: clock[0])), \
+             patch.object(main, 'scoring_cache', cache.TieredCache('scoring', 1024 * 1024, ttl=60)), \
+             patch.object(main, 'PROMPTS_PATH', prompts_path), \
+             patch.object(main, 'COMPANY_PROFILE_PATH', profile_path), \
+             patch.object(main, '_scoring_cache_fingerprint', main.config_fingerprint()), \
+             patch.object(main, 'analyze_resume', return_value=json.dumps({"name": "Cached Candidate"})), \
+             patch.object(main, 'score_candidate_with_company_context', score):
+            m.get("https://example.com/job", text="<html><body>Senior Engineer building Python services and data pipelines</body></html>")
+            
+            with main.app.test_client() as client:
+                analyze(client)
+                analyze(client)
+                clock[0] += 61  # Past the TTL
+                analyze(client)
+                prompts.write_json_atomic(prompts_path, dict(prompts.get_prompts(), note="edited"))
+                analyze(client)
+                analyze(client)
+                prompts.write_json_atomic(profile_path, {"company_focus": {"core_mission": "Edited mission"}})
+                analyze(client)
+    
+    expected = ["MISS", "HIT", "MISS", "MISS", "HIT", "MISS"]
+    if statuses == [(status, status) for status in expected] and score.call_count == 4:
+        print("✅ Scoring cache working")
+        return True
+    else:
+        print(f"❌ Scoring cache statuses {statuses}, scoring called {score.call_count} times")
+        return False
+
+def test_analysis_job():
+    """Test queued analysis jobs report real stage progress"""
+    print("Testing analysis jobs...")
+    
+    import io
+    import json
+    import time
+    import main
+    
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'analyze_resume', return_value=json.dumps({"name": "Queued Candidate"})), \
+         patch.object(main, 'score_candidate_with_company_context', return_value=json.dumps({"overall_score": 8})):
+        m.get("https://example.com/job", text="<html><body>Senior Engineer building Python services and data pipelines</body></html>")
+        
+        with main.app.test_client() as client:
+            submitted = client.post('/jobs', data={
+                'jd_url': 'https://example.com/job',
+                'resume_file': (io.BytesIO(b"Queued Candidate"), 'queued.txt')
+            }, content_type='multipart/form-data')
+            job_id = submitted.get_json()["job_id"]
+            
+            job = {}
+            for _ in range(50):
+                job = client.get(f'/jobs/{job_id}').get_json()
+                if job["status"] in ("completed", "failed"):
+                    break
+                time.sleep(0.1)
+    
+    # The JD fetch overlaps resume extraction, so only the start and end order are fixed
+    stages = [event["stage"] for event in job.get("events", [])]
+    if submitted.status_code == 202 and job.get("status") == "completed" and \
+            sorted(stages) == sorted(["started", "jd_fetched", "text_extracted", "resume_analyzed", "scored"]) and \
+            stages[0] == "started" and stages[-1] == "scored":
+        print("✅ Analysis jobs working")
+        return True
+    else:
+        print(f"❌ Analysis job returned unexpected state: {job}")
+        return False
+
 def test_flask_app():
     """Test Flask app startup"""
     print("Testing Flask app initialization...")
@@ -109,6 +1085,86 @@ def test_file_structure():
     
     return len(missing) == 0
 
+def test_metrics():
+    """Test stage timings and Gemini token usage reach /metrics and the timing block"""
+    print("Testing metrics...")
+    
+    import io
+    import json
+    import uuid
+    import main
+    
+    def fake_generate(prompt, **kwargs):
+        text = json.dumps({"overall_score": 6}) if "CANDIDATE" in prompt else json.dumps({"name": "Measured Candidate"})
+        return Mock(text=text, usage_metadata=Mock(prompt_token_count=120, candidates_token_count=30))
+    
+    fake_model = Mock()
+    fake_model.generate_content.side_effect = fake_generate
+    
+    with requests_mock.Mocker() as m, \
+         patch.object(main, 'get_model', return_value=fake_model), \
+         patch.object(main, 'COMPANY_PROFILE', None):
+        m.get("https://example.com/job", text="<html><body>Senior Engineer building Python services and data pipelines</body></html>")
+        
+        with main.app.test_client() as client:
+            result = client.post('/analyze', data={
+                'jd_url': 'https://example.com/job',
+                'timings': 'true',
+                'resume_file': (io.BytesIO(f"Candidate {uuid.uuid4()}".encode('utf-8')), 'measured.txt')
+            }, content_type='multipart/form-data').get_json()
+            exposition = client.get('/metrics').get_data(as_text=True)
+    
+    timings = result.get("timings", {})
+    expected = [
+        'hr_scorer_stage_duration_seconds_count{stage="analyze"}',
+        'hr_scorer_gemini_tokens_total{prompt="analyze_resume",direction="input"}',
+        'hr_scorer_request_duration_seconds_count{endpoint="analyze",status="200"}',
+        'hr_scorer_cache_lookups_total{cache="resume",result="miss"}'
+    ]
+    missing = [line for line in expected if line not in exposition]
+    if result.get("success") and set(timings.get("stages", {})) == {"jd", "extract", "analyze", "score"} and \
+            timings.get("gemini", {}).get("analyze_resume", {}).get("input_tokens") == 120 and not missing:
+        print("✅ Metrics working")
+        return True
+    else:
+        print(f"❌ Metrics missing {missing}, timings: {timings}")
+        return False
+
+def test_benchmark():
+    """Test the offline benchmark runs end to end against the fakes"""
+    print("Testing benchmark harness...")
+    
+    import benchmark
+    
+    args = benchmark.parse_args([
+        '--requests', '6', '--concurrency', '3', '--jds', '2',
+        '--gemini-latency', '0', '--docai-latency', '0', '--jd-latency', '0'
+    ])
+    results = benchmark.run_benchmark(args)
+    
+    latency = results["latency_seconds"]
+    if results["succeeded"] == 6 and latency["p50"] <= latency["p95"] <= latency["p99"] and results["requests_per_second"]:
+        print("✅ Benchmark harness working")
+        return True
+    else:
+        print(f"❌ Benchmark returned unexpected results: {results}")
+        return False
+
+def test_cold_start():
+    """Test importing main.py leaves the heavy SDKs for first use"""
+    print("Testing cold start...")
+    
+    import benchmark
+    
+    results = benchmark.run_startup_benchmark(benchmark.parse_args(['--startup', '--runs', '1']))
+    
+    if not results["deferred_modules_loaded_at_import"]:
+        print(f"✅ Cold start working ({results['import_seconds']['p50']:.2f}s import)")
+        return True
+    else:
+        print(f"❌ Imported eagerly: {results['deferred_modules_loaded_at_import']}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 HR Candidate Scorer - Local Test Suite")
@@ -118,7 +1174,35 @@ def main():
         ("File Structure", test_file_structure),
         ("Dependencies", test_dependencies), 
         ("Flask App", test_flask_app),
-        ("URL Extraction", test_url_extraction)
+        ("URL Extraction", test_url_extraction),
+        ("JD Revalidation", test_jd_revalidation),
+        ("JD Extraction", test_jd_extraction),
+        ("Company Crawl", test_company_crawl),
+        ("Company Crawl Sitemap", test_company_crawl_sitemap),
+        ("Company Crawl Deadline", test_company_crawl_deadline),
+        ("Incremental JSON", test_incremental_json),
+        ("Stage Graph", test_stage_graph),
+        ("Stage Cancellation", test_stage_cancellation),
+        ("Hedged PDF Extraction", test_hedged_pdf_extraction),
+        ("Batch Analysis", test_batch_analysis),
+        ("Batch Disconnect", test_batch_disconnect),
+        ("Batch Pre-screening", test_batch_prescreen),
+        ("Scoring Cascade", test_scoring_cascade),
+        ("Scoring Context Cache", test_scoring_context_cache),
+        ("Gemini Rate Limiter", test_gemini_rate_limiter),
+        ("Prompt Budget", test_prompt_budget),
+        ("Company Page Budget", test_company_page_budget),
+        ("Config Hot Reload", test_config_reload),
+        ("Incremental Company Profile", test_incremental_company_profile),
+        ("Tenant Profiles", test_tenant_profiles),
+        ("Upload Limits", test_upload_limits),
+        ("Structured Output", test_structured_output),
+        ("Resume Cache", test_resume_cache),
+        ("Scoring Cache", test_scoring_cache),
+        ("Analysis Jobs", test_analysis_job),
+        ("Metrics", test_metrics),
+        ("Benchmark", test_benchmark),
+        ("Cold Start", test_cold_start)
     ]
     
     results = []
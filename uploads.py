@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory resume uploads for the HR Candidate Scorer application.
+
+Uploads are copied off the request in fixed-size chunks, hashed as they go
+and rejected once they pass the per-file limit. Small files stay in memory
+while a process-wide budget allows; anything larger spills to a temporary
+file, which PDF extraction reads through a memory map (and worker processes
+reopen by path) instead of holding another copy of the bytes.
+"""
+
+import os
+import io
+import mmap
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from metrics import UPLOAD_BYTES
+
+CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the per-file size limit"""
+
+class MemoryBudget:
+    """Process-wide count of upload bytes held in memory, capped at `max_bytes`"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        """Account for `size` bytes if they fit in the budget; False if they don't"""
+        with self._lock:
+            if self.in_use + size > self.max_bytes:
+                return False
+            self.in_use += size
+            self.peak = max(self.peak, self.in_use)
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.in_use -= size
+
+class Upload:
+    """One uploaded file, held either as bytes in memory or in a temporary file on disk"""
+
+    def __init__(self, filename, data=None, file=None, size=0, content_hash=None, budget=None):
+        self.filename = filename
+        self.data = data
+        self.file = file
+        self.size = size
+        self.content_hash = content_hash or hashlib.sha256(data or b"").hexdigest()
+        self._budget = budget
+
+    @classmethod
+    def from_bytes(cls, filename, data):
+        """Wrap content that is already in memory (not charged to any budget)"""
+        return cls(filename, data=data, size=len(data))
+
+    @property
+    def storage(self):
+        return "memory" if self.file is None else "disk"
+
+    @property
+    def path(self):
+        """Path of the spooled file, or None when the upload is held in memory"""
+        return self.file.name if self.file is not None else None
+
+    @property
+    def pdf_source(self):
+        """What PDF extraction should read: the spooled file's path, or the bytes"""
+        return self.path or self.data
+
+    def read(self):
+        """The whole upload as bytes (reads the spooled file for disk-backed uploads)"""
+        if self.file is None:
+            return self.data
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        """Release the memory budget and delete the spooled file"""
+        if self._budget is not None and self.data is not None:
+            self._budget.release(self.size)
+        self._budget = None
+        self.data = None
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def as_upload(filename, content):
+    """Return `content` as an Upload, wrapping raw bytes"""
+    return content if isinstance(content, Upload) else Upload.from_bytes(filename, content)
+
+def spool_upload(filename, stream, max_bytes, memory_threshold, budget=None, directory=None):
+    """Copy a file stream into an Upload without ever buffering more than `memory_threshold` bytes.
+
+    Raises UploadTooLarge past `max_bytes`. Files up to `memory_threshold`
+    stay in memory if `budget` has room; the rest go to a temporary file.
+    """
+    digest = hashlib.sha256()
+    chunks, size, spooled = [], 0, None
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLarge(f"{filename} is larger than the {max_bytes // (1024 * 1024)} MB upload limit")
+            digest.update(chunk)
+            if spooled is None and size > memory_threshold:
+                spooled = tempfile.NamedTemporaryFile(prefix='hr-scorer-upload-', dir=directory)
+                spooled.writelines(chunks)
+                chunks = []
+            if spooled is not None:
+                spooled.write(chunk)
+            else:
+                chunks.append(chunk)
+
+        if spooled is None:
+            data = b"".join(chunks)
+            if budget is None or budget.reserve(size):
+                UPLOAD_BYTES.observe(size, storage="memory")
+                return Upload(filename, data=data, size=size, content_hash=digest.hexdigest(), budget=budget)
+            # Over the memory budget: park it on disk like a large file
+            spooled = tempfile.NamedTemporaryFile(prefix='hr-scorer-upload-', dir=directory)
+            spooled.write(data)
+        spooled.flush()
+    except BaseException:
+        if spooled is not None:
+            spooled.close()
+        raise
+    UPLOAD_BYTES.observe(size, storage="disk")
+    return Upload(filename, file=spooled, size=size, content_hash=digest.hexdigest())
+
+@contextmanager
+def open_pdf_stream(source):
+    """Seekable stream over a PDF given as bytes or a file path (memory-mapped, not read into memory)"""
+    if not isinstance(source, str):
+        yield io.BytesIO(source)
+        return
+    with open(source, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield io.BytesIO(b"")
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+def read_source(source):
+    """PDF bytes for APIs that need them in memory (e.g. the Document AI request)"""
+    if not isinstance(source, str):
+        return source
+    with open(source, 'rb') as f:
+        return f.read()
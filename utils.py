@@ -5,79 +5,314 @@ Shared utility functions for the HR Candidate Scorer application.
 
 import os
 import json
-import requests
+import time
 import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
-import google.generativeai as genai
-
-PROMPTS = {}
-try:
-    with open('prompts.json', 'r') as f:
-        PROMPTS = json.load(f)
-except Exception as e:
-    print(f"⚠️  Error loading prompts.json: {str(e)}")
-
-def get_prompt(prompt_name, **kwargs):
-    """Get and format a prompt from the loaded prompts."""
-    prompt_template = PROMPTS.get(prompt_name, {}).get("prompt", "")
-    return prompt_template.format(**kwargs)
-
-def extract_company_pages(company_website):
-    """Extract content from key company pages"""
+from metrics import REGISTRY, GEMINI_ERRORS, GEMINI_RETRIES, record_gemini_call
+from prompts import get_prompt, get_response_schema
+from cache import hash_text
+from ratelimit import RateLimiter, TokenBucket, SharedTokenBucket, AIMDLimiter
+from jd_extraction import parse_html, element_text
+from structured import StructuredOutputError, generation_config, generate_structured
+
+GEMINI_RPM = float(os.environ.get('GEMINI_RPM', 0))
+GEMINI_BURST = int(os.environ.get('GEMINI_BURST', 10))
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', 16))
+GEMINI_MIN_CONCURRENCY = int(os.environ.get('GEMINI_MIN_CONCURRENCY', 1))
+GEMINI_MAX_ATTEMPTS = int(os.environ.get('GEMINI_MAX_ATTEMPTS', 4))
+GEMINI_RETRY_DEADLINE = float(os.environ.get('GEMINI_RETRY_DEADLINE', 120))
+GEMINI_RATE_LIMIT_PATH = os.environ.get('GEMINI_RATE_LIMIT_PATH', '')
+
+def build_gemini_limiter():
+    """Rate limiter shared by every Gemini call in this process, configured from the environment"""
+    bucket = None
+    if GEMINI_RPM > 0:
+        if GEMINI_RATE_LIMIT_PATH:
+            bucket = SharedTokenBucket(GEMINI_RATE_LIMIT_PATH, GEMINI_RPM / 60, GEMINI_BURST)
+        else:
+            bucket = TokenBucket(GEMINI_RPM / 60, GEMINI_BURST)
+    concurrency = AIMDLimiter(GEMINI_MAX_CONCURRENCY, minimum=GEMINI_MIN_CONCURRENCY, maximum=GEMINI_MAX_CONCURRENCY)
+    return RateLimiter(bucket, concurrency, max_attempts=GEMINI_MAX_ATTEMPTS, deadline=GEMINI_RETRY_DEADLINE)
+
+gemini_limiter = build_gemini_limiter()
+
+def _collect_limiter_metrics():
+    concurrency = gemini_limiter.concurrency
+    return [
+        ("hr_scorer_gemini_concurrency_limit", "gauge", "Current adaptive limit on concurrent Gemini calls",
+         [({}, round(concurrency.limit, 2))]),
+        ("hr_scorer_gemini_in_flight", "gauge", "Gemini calls currently in flight", [({}, concurrency.in_flight)]),
+    ]
+
+REGISTRY.add_collector(_collect_limiter_metrics)
+
+def generate_text(model, prompt_name, prompt, on_chunk=None, generation_config=None):
+    """Call Gemini and return the response text, recording latency and token usage under `prompt_name`.
+    
+    When `on_chunk` is given the response is streamed and each text delta is
+    passed to it as it arrives; the full text is returned either way. Calls go
+    through the shared Gemini rate limiter, which retries throttled and
+    transient failures (a stream is only retried before it emits anything).
+    """
+    emitted = []
+    
+    def attempt():
+        started = time.perf_counter()
+        try:
+            if on_chunk is None:
+                response = model.generate_content(prompt, generation_config=generation_config)
+                text = response.text
+            else:
+                response = model.generate_content(prompt, generation_config=generation_config, stream=True)
+                for chunk in response:
+                    try:
+                        delta = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. the final finish-reason chunk)
+                        continue
+                    if delta:
+                        emitted.append(delta)
+                        on_chunk(delta)
+                text = "".join(emitted)
+        except Exception:
+            GEMINI_ERRORS.inc(prompt=prompt_name)
+            raise
+        record_gemini_call(prompt_name, time.perf_counter() - started, getattr(response, 'usage_metadata', None))
+        return text
+    
+    def on_retry(kind, error):
+        GEMINI_RETRIES.inc(prompt=prompt_name, reason=kind)
+        print(f"⚠️  Gemini {prompt_name} call {kind} ({str(error)[:120]}) - retrying")
+    
+    return gemini_limiter.call(attempt, can_retry=lambda: not emitted, on_retry=on_retry)
+
+# Default company pages to analyze (page type, path)
+DEFAULT_COMPANY_PAGES = [
+    ('about', '/about'),
+    ('about-us', '/about-us'),
+    ('careers', '/careers'),
+    ('jobs', '/jobs'),
+    ('team', '/team'),
+    ('culture', '/culture'),
+    ('values', '/values'),
+    ('mission', '/mission'),
+    ('news', '/news'),
+    ('blog', '/blog')
+]
+
+COMPANY_CRAWL_WORKERS = int(os.environ.get('COMPANY_CRAWL_WORKERS', 8))
+COMPANY_CRAWL_PER_HOST = int(os.environ.get('COMPANY_CRAWL_PER_HOST', 4))
+COMPANY_CRAWL_DEADLINE = float(os.environ.get('COMPANY_CRAWL_DEADLINE', 30))
+COMPANY_CRAWL_MAX_PAGES = int(os.environ.get('COMPANY_CRAWL_MAX_PAGES', 20))
+COMPANY_CRAWL_PAGES = os.environ.get('COMPANY_CRAWL_PAGES', '')
+COMPANY_CRAWL_SITEMAP = os.environ.get('COMPANY_CRAWL_SITEMAP', 'true').lower() == 'true'
+
+# Sitemap pages deeper than this (blog posts, single job postings) are skipped
+SITEMAP_MAX_DEPTH = 2
+# Listing pages whose children are individual articles or postings rather than company pages
+SITEMAP_COLLECTIONS = {'blog', 'news', 'jobs', 'careers', 'press', 'events'}
+
+CRAWL_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+def _page_type(path):
+    """Derive a page type label from a URL path"""
+    segments = [segment for segment in path.strip('/').split('/') if segment]
+    return segments[-1].lower() if segments else 'main'
+
+def discover_sitemap_pages(session, base_url, timeout=5):
+    """Find company pages of interest listed in the site's sitemap.xml"""
+    keywords = [page_type for page_type, _ in DEFAULT_COMPANY_PAGES]
+    try:
+        response = session.get(urljoin(base_url, '/sitemap.xml'), timeout=timeout, headers=CRAWL_HEADERS)
+        if response.status_code != 200:
+            return []
+        locations = re.findall(r'<loc>\s*([^<\s]+)\s*</loc>', response.text)
+    except Exception as e:
+        print(f"Could not read sitemap: {str(e)}")
+        return []
+    
+    pages = []
+    for location in locations:
+        parsed = urlparse(location)
+        # Only keep same-site pages whose own path segment names a page type we care about
+        if parsed.netloc != urlparse(base_url).netloc:
+            continue
+        segments = [segment for segment in parsed.path.lower().split('/') if segment]
+        if not segments or len(segments) > SITEMAP_MAX_DEPTH or SITEMAP_COLLECTIONS.intersection(segments[:-1]):
+            continue
+        words = set(re.split(r'[-_.]', segments[-1]))
+        if segments[-1] in keywords or words.intersection(keywords):
+            pages.append((_page_type(parsed.path), location))
+    return pages
+
+def _build_page_list(session, company_website, base_url, pages):
+    """Resolve the list of (page type, URL) pairs to crawl"""
+    if pages is None and COMPANY_CRAWL_PAGES:
+        pages = [path.strip() for path in COMPANY_CRAWL_PAGES.split(',') if path.strip()]
+    if pages is None:
+        pages_to_check = [(page_type, urljoin(base_url, path)) for page_type, path in DEFAULT_COMPANY_PAGES]
+        if COMPANY_CRAWL_SITEMAP:
+            # A page the sitemap lists (e.g. /en/about) replaces the guessed URL of the same type
+            guessed = {page_type: index for index, (page_type, _) in enumerate(pages_to_check)}
+            for page_type, url in discover_sitemap_pages(session, base_url):
+                if page_type in guessed:
+                    pages_to_check[guessed.pop(page_type)] = (page_type, url)
+                else:
+                    pages_to_check.append((page_type, url))
+    else:
+        pages_to_check = [(_page_type(urlparse(path).path), urljoin(base_url, path)) for path in pages]
+    
+    # Main page first, drop duplicate URLs and page types, cap the total
+    unique_pages = [('main', company_website)]
+    seen_urls = {company_website.rstrip('/')}
+    seen_types = {'main'}
+    for page_type, url in pages_to_check:
+        if url.rstrip('/') in seen_urls or page_type in seen_types:
+            continue
+        seen_urls.add(url.rstrip('/'))
+        seen_types.add(page_type)
+        unique_pages.append((page_type, url))
+    return unique_pages[:COMPANY_CRAWL_MAX_PAGES]
+
+def _extract_page(session, url, host_limits, deadline_at):
+    """Fetch one company page and return its cleaned text"""
+    host = urlparse(url).netloc
+    with host_limits[host]:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Crawl deadline reached")
+        response = session.get(url, timeout=min(10, remaining), headers=CRAWL_HEADERS)
+    if response.status_code != 200:
+        return ""
+    
+    soup = parse_html(response.content)
+    
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    
+    # One line per block element, so the prompt budget can rank paragraphs rather than whole pages
+    return element_text(soup.body or soup)
+
+def _close_when_finished(session, futures):
+    """Close `session` once every future using it is done (cancelled futures count as done)"""
+    pending = [len(futures)]
+    lock = threading.Lock()
+    
+    def finished(_):
+        with lock:
+            pending[0] -= 1
+            last = pending[0] == 0
+        if last:
+            session.close()
+    
+    if not futures:
+        session.close()
+    for future in futures:
+        future.add_done_callback(finished)
+
+def extract_company_pages(company_website, pages=None, deadline=None):
+    """Extract content from key company pages concurrently.
+    
+    `pages` is an optional list of paths or URLs to crawl instead of the default
+    page list (which is extended with sitemap-discovered pages). The crawl stops
+    after `deadline` seconds and returns whatever has been extracted by then.
+    """
     if not company_website:
         return {}
     
     try:
         parsed_url = urlparse(company_website)
         base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        deadline = COMPANY_CRAWL_DEADLINE if deadline is None else deadline
+        deadline_at = time.monotonic() + deadline
         
-        # Key pages to analyze
-        pages_to_check = [
-            ('main', company_website),
-            ('about', urljoin(base_url, '/about')),
-            ('about-us', urljoin(base_url, '/about-us')),
-            ('careers', urljoin(base_url, '/careers')),
-            ('jobs', urljoin(base_url, '/jobs')),
-            ('team', urljoin(base_url, '/team')),
-            ('culture', urljoin(base_url, '/culture')),
-            ('values', urljoin(base_url, '/values')),
-            ('mission', urljoin(base_url, '/mission')),
-            ('news', urljoin(base_url, '/news')),
-            ('blog', urljoin(base_url, '/blog'))
-        ]
+        # Only the deploy-time crawl needs these, so keep them off the web app's import path
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        futures = {}
+        try:
+            adapter = HTTPAdapter(pool_connections=COMPANY_CRAWL_PER_HOST, pool_maxsize=COMPANY_CRAWL_WORKERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            
+            pages_to_check = _build_page_list(session, company_website, base_url, pages)
+            host_limits = defaultdict(lambda: threading.BoundedSemaphore(COMPANY_CRAWL_PER_HOST))
+            # Create every host semaphore up front so worker threads never race to create one
+            for _, url in pages_to_check:
+                host_limits[urlparse(url).netloc]
+            
+            executor = ThreadPoolExecutor(max_workers=COMPANY_CRAWL_WORKERS)
+            futures = {
+                executor.submit(_extract_page, session, url, host_limits, deadline_at): page_type
+                for page_type, url in pages_to_check
+            }
+            done, not_done = wait(futures, timeout=max(0, deadline_at - time.monotonic()))
+            executor.shutdown(wait=False, cancel_futures=True)
+        finally:
+            # Pages still downloading past the deadline keep using the session, so it is closed once they finish
+            _close_when_finished(session, futures)
         
-        extracted_pages = {}
+        if not_done:
+            print(f"⚠️  Crawl deadline reached - skipped {len(not_done)} pages")
         
-        for page_type, url in pages_to_check:
+        texts = {}
+        for future in done:
+            page_type = futures[future]
             try:
-                response = requests.get(url, timeout=10, headers={
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-                })
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Remove script and style elements
-                    for script in soup(["script", "style", "nav", "footer", "header"]):
-                        script.decompose()
-                    
-                    text = soup.get_text()
-                    # Clean up whitespace
-                    text = re.sub(r'\s+', ' ', text).strip()
-                    
-                    if len(text) > 200:  # Only include meaningful content
-                        extracted_pages[page_type] = text[:2000]  # Limit content length
-                        
+                texts[page_type] = future.result()
             except Exception as e:
                 print(f"Could not extract {page_type} page: {str(e)}")
-                continue
-                
+        
+        # Keep the page list order so the main page leads the combined content
+        extracted_pages = {}
+        for page_type, _ in pages_to_check:
+            text = texts.get(page_type, "")
+            if len(text) > 200:  # Only include meaningful content
+                extracted_pages[page_type] = text[:2000]  # Limit content length
+        
         return extracted_pages
         
     except Exception as e:
         print(f"Error extracting company pages: {str(e)}")
         return {}
 
+def company_page_hashes(company_pages):
+    """Content hash of each extracted company page, used to skip re-analysis when nothing changed"""
+    return {page_type: hash_text(content) for page_type, content in company_pages.items()}
+
+def combine_company_pages(company_pages):
+    """Join extracted pages under a heading per page, for the company analysis prompt"""
+    combined_content = ""
+    for page_type, content in company_pages.items():
+        combined_content += f"\n--- {page_type.upper()} PAGE ---\n{content}\n"
+    return combined_content
+
+def analyze_company_pages(company_pages, model):
+    """Build a company profile from already extracted pages with one Gemini call, or None"""
+    # Analyze with Gemini
+    analysis_prompt = get_prompt(
+        "analyze_company_profile",
+        combined_content=combine_company_pages(company_pages)
+    )
+    
+    schema = get_response_schema("analyze_company_profile")
+    try:
+        return generate_structured(
+            "analyze_company_profile",
+            lambda attempt: generate_text(model, "analyze_company_profile", analysis_prompt,
+                                          generation_config=generation_config(schema)),
+            schema
+        )
+    except StructuredOutputError:
+        return None
+
 def analyze_company_profile(company_website, model):
     """Comprehensive company analysis using web scraping + LLM"""
     if not company_website:
@@ -90,29 +325,65 @@ def analyze_company_profile(company_website, model):
         if not company_pages:
             return None
         
-        # Combine all extracted content
-        combined_content = ""
-        for page_type, content in company_pages.items():
-            combined_content += f"\n--- {page_type.upper()} PAGE ---\n{content}\n"
-        
-        # Analyze with Gemini
-        analysis_prompt = get_prompt(
-            "analyze_company_profile",
-            combined_content=combined_content[:8000]
-        )
-        
-        response = model.generate_content(analysis_prompt)
-        
-        # Parse response
-        try:
-            cleaned_response = re.sub(r'```json\s*|\s*```', '', response.text).strip()
-            company_profile = json.loads(cleaned_response)
-            return company_profile
-        except json.JSONDecodeError as e:
-            print(f"Error decoding company analysis JSON: {e}")
-            print(f"Raw response was: {response.text}")
-            return None
+        return analyze_company_pages(company_pages, model)
             
     except Exception as e:
         print(f"Error analyzing company profile: {str(e)}")
         return None
+
+class IncrementalJSONParser:
+    """Parse top-level fields of a JSON object as its text streams in.
+    
+    Each call to `feed()` returns the fields completed by the new text, so
+    callers can render early fields (e.g. scores) before the object finishes.
+    Text before the opening brace (such as a markdown fence) is ignored.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._field_start = None
+    
+    def _complete_field(self, end):
+        segment = self.buffer[self._field_start:end].strip()
+        if not segment:
+            return {}
+        try:
+            return json.loads("{" + segment + "}")
+        except json.JSONDecodeError:
+            return {}
+    
+    def feed(self, text):
+        """Consume more text and return newly completed top-level fields"""
+        self.buffer += text
+        completed = {}
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1 and char == '{' and self._field_start is None:
+                    self._field_start = self._pos + 1
+            elif char in '}]':
+                if self._depth == 1 and self._field_start is not None:
+                    completed.update(self._complete_field(self._pos))
+                    self._field_start = len(self.buffer) + 1  # Object closed - ignore trailing text
+                self._depth -= 1
+            elif char == ',' and self._depth == 1 and self._field_start is not None:
+                completed.update(self._complete_field(self._pos))
+                self._field_start = self._pos + 1
+            self._pos += 1
+        self.fields.update(completed)
+        return completed